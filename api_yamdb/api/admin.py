@@ -32,6 +32,7 @@ class TitleAdmin(admin.ModelAdmin):
         "category",
         "name",
         "year",
+        "rating",
         "description",
     )
     empty_value_display = EMPTY
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .db import primary_reads
+from users.models import TokenUser, User
+
+STATE_KEY = "auth:user:{}"
+CLAIMS = ("username", "role", "is_superuser")
+
+
+def get_token_claims(user):
+    return {claim: getattr(user, claim) for claim in CLAIMS}
+
+
+def get_auth_state(user_id):
+    """
+    Текущие роль и статус пользователя.
+
+    Берутся из кэша, при промахе читаются из базы и кэшируются на
+    AUTH_STATE_TIMEOUT секунд. Кэш живёт дольше отставания реплики,
+    поэтому состояние читается только из основной базы.
+    """
+    key = STATE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        with primary_reads():
+            state = (
+                User.objects.filter(pk=user_id)
+                .values(*CLAIMS, "is_active")
+                .first()
+            )
+        if state is not None:
+            cache.set(key, state, settings.AUTH_STATE_TIMEOUT)
+    return state
+
+
+def forget_auth_state_on_commit(user_id):
+    transaction.on_commit(lambda: cache.delete(STATE_KEY.format(user_id)))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без выборки пользователя на каждый запрос.
+
+    Токен, выданный UserTokenViewSet, содержит имя, роль и is_superuser.
+    Они сверяются с закэшированным состоянием пользователя, так что
+    смена роли или блокировка отзывают токен, а объект пользователя
+    собирается из токена. Токены без этих утверждений проверяются
+    по базе, как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        state = get_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(
+                "Пользователь не найден", code="user_not_found"
+            )
+        if not state["is_active"]:
+            raise AuthenticationFailed(
+                "Пользователь заблокирован", code="user_inactive"
+            )
+        if any(state[claim] != validated_token[claim] for claim in CLAIMS):
+            raise AuthenticationFailed(
+                "Права пользователя изменились, получите новый токен",
+                code="token_outdated",
+            )
+        return TokenUser(
+            pk=user_id,
+            is_active=True,
+            **{claim: validated_token[claim] for claim in CLAIMS},
+        )
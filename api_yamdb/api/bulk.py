@@ -0,0 +1,255 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .cache import bump_version_on_commit
+from .slugs import SLUG_CACHES
+from reviews.models import Category, Genre, Title
+
+
+def item_error(errors):
+    return {"status": "error", "errors": errors}
+
+
+def batch_error(message):
+    return serializers.ValidationError(
+        {api_settings.NON_FIELD_ERRORS_KEY: [message]}
+    )
+
+
+class BulkWriteMixin:
+    """
+    Пакетная запись каталога: POST (создание) и PATCH (изменение)
+    массивом объектов на <list>/bulk/.
+
+    Каждый элемент проверяется отдельно, неверные элементы не мешают
+    записи остальных. Ответ содержит результат для каждого элемента в
+    порядке запроса. Пакетные вставки не вызывают сигналы моделей,
+    поэтому версия каталога сдвигается вручную.
+
+    Наследник задаёт bulk_create_items и bulk_update_items: они получают
+    проверенные элементы {индекс: данные} и заполняют results.
+    """
+
+    bulk_serializer_class = None
+    bulk_hooks = ("bulk_create_items", "bulk_update_items")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [
+            name
+            for name in cls.bulk_hooks
+            if not callable(getattr(cls, name, None))
+        ]
+        if missing:
+            raise TypeError(f"{cls.__name__} must define {', '.join(missing)}")
+
+    @action(detail=False, methods=["POST", "PATCH"], url_path="bulk")
+    def bulk(self, request):
+        if request.method == "PATCH" and not hasattr(self, "update"):
+            raise MethodNotAllowed(request.method)
+        items = request.data
+        if not isinstance(items, list):
+            raise batch_error("Ожидается список объектов")
+        if len(items) > settings.BULK_MAX_ITEMS:
+            raise batch_error(
+                f"Не больше {settings.BULK_MAX_ITEMS} объектов за запрос"
+            )
+
+        partial = request.method == "PATCH"
+        results = [None] * len(items)
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = self.bulk_serializer_class(data=item, partial=partial)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                results[index] = item_error(serializer.errors)
+
+        try:
+            with transaction.atomic():
+                if partial:
+                    self.bulk_update_items(valid, results)
+                else:
+                    self.bulk_create_items(valid, results)
+                bump_version_on_commit("catalogue")
+        except IntegrityError:
+            # Параллельный запрос успел записать те же объекты.
+            raise batch_error("Пакет конфликтует с параллельной записью")
+        return Response({"results": results})
+
+
+class SlugBulkWriteMixin(BulkWriteMixin):
+    """Пакетная запись справочников с уникальным slug."""
+
+    def bulk_create_items(self, items, results):
+        model = self.get_queryset().model
+        existing = set(
+            model.objects.filter(
+                slug__in=[data["slug"] for data in items.values()]
+            ).values_list("slug", flat=True)
+        )
+        created = {}
+        for index, data in items.items():
+            if data["slug"] in existing:
+                results[index] = item_error(
+                    {"slug": [f'Объект "{data["slug"]}" уже существует']}
+                )
+                continue
+            existing.add(data["slug"])
+            created[index] = model(**data)
+
+        model.objects.bulk_create(created.values())
+        SLUG_CACHES[model].invalidate_on_commit()
+        for index, obj in created.items():
+            results[index] = {"status": "created", "slug": obj.slug}
+
+    def bulk_update_items(self, items, results):
+        model = self.get_queryset().model
+        keyed = {}
+        for index, data in items.items():
+            if "slug" in data:
+                keyed[index] = data
+            else:
+                results[index] = item_error({"slug": ["Обязательное поле."]})
+        found = model.objects.in_bulk(
+            [data["slug"] for data in keyed.values()], field_name="slug"
+        )
+
+        updated = {}
+        fields = set()
+        for index, data in keyed.items():
+            obj = found.get(data["slug"])
+            if obj is None:
+                results[index] = item_error(
+                    {"slug": [f'Объект "{data["slug"]}" не найден']}
+                )
+                continue
+            for field, value in data.items():
+                setattr(obj, field, value)
+            fields.update(data)
+            updated[index] = obj
+
+        fields.discard("slug")
+        if fields:
+            model.objects.bulk_update(updated.values(), fields)
+            SLUG_CACHES[model].invalidate_on_commit()
+        for index, obj in updated.items():
+            results[index] = {"status": "updated", "slug": obj.slug}
+
+
+class TitleBulkWriteMixin(BulkWriteMixin):
+    """
+    Пакетная запись произведений.
+
+    Слаги жанров и категорий всего пакета разрешаются через кэш
+    справочников, связи с жанрами вставляются одним запросом в
+    промежуточную таблицу.
+    """
+
+    def resolve_slugs(self, items, results):
+        genre_slugs = set()
+        category_slugs = set()
+        for data in items.values():
+            genre_slugs.update(data.get("genre", ()))
+            if "category" in data:
+                category_slugs.add(data["category"])
+        genres = SLUG_CACHES[Genre].get_ids(genre_slugs)
+        categories = SLUG_CACHES[Category].get_ids(category_slugs)
+
+        resolved = {}
+        for index, data in items.items():
+            errors = {}
+            missing = [
+                slug for slug in data.get("genre", ()) if slug not in genres
+            ]
+            if missing:
+                errors["genre"] = [
+                    f'Жанр "{slug}" не найден' for slug in missing
+                ]
+            if "category" in data and data["category"] not in categories:
+                errors["category"] = [
+                    f'Категория "{data["category"]}" не найдена'
+                ]
+            if errors:
+                results[index] = item_error(errors)
+                continue
+
+            data = dict(data)
+            if "genre" in data:
+                data["genre"] = {genres[slug] for slug in data["genre"]}
+            if "category" in data:
+                data["category_id"] = categories[data.pop("category")]
+            resolved[index] = data
+        return resolved
+
+    def bulk_create_items(self, items, results):
+        resolved = self.resolve_slugs(items, results)
+        titles = {}
+        for index, data in resolved.items():
+            data.pop("id", None)
+            genre_ids = data.pop("genre")
+            titles[index] = (Title(**data), genre_ids)
+
+        Title.objects.bulk_create(title for title, _ in titles.values())
+        self.set_genres(titles.values(), replace=False)
+        for index, (title, _) in titles.items():
+            results[index] = {"status": "created", "id": title.id}
+
+    def bulk_update_items(self, items, results):
+        keyed = {}
+        for index, data in items.items():
+            if "id" in data:
+                keyed[index] = data
+            else:
+                results[index] = item_error({"id": ["Обязательное поле."]})
+        resolved = self.resolve_slugs(keyed, results)
+        found = Title.objects.in_bulk(
+            [data["id"] for data in resolved.values()]
+        )
+
+        updated = {}
+        fields = set()
+        for index, data in resolved.items():
+            title = found.get(data.pop("id"))
+            if title is None:
+                results[index] = item_error(
+                    {"id": ["Произведение не найдено"]}
+                )
+                continue
+            genre_ids = data.pop("genre", None)
+            for field, value in data.items():
+                setattr(title, field, value)
+            fields.update(data)
+            updated[index] = (title, genre_ids)
+
+        if fields:
+            Title.objects.bulk_update(
+                [title for title, _ in updated.values()], fields
+            )
+        self.set_genres(
+            (title, genre_ids)
+            for title, genre_ids in updated.values()
+            if genre_ids is not None
+        )
+        for index, (title, _) in updated.items():
+            results[index] = {"status": "updated", "id": title.id}
+
+    @staticmethod
+    def set_genres(titles, replace=True):
+        """Записывает жанры произведений одним DELETE и одним INSERT."""
+        titles = list(titles)
+        through = Title.genre.through
+        if replace:
+            through.objects.filter(
+                title_id__in=[title.id for title, _ in titles]
+            ).delete()
+        through.objects.bulk_create(
+            through(title_id=title.id, genre_id=genre_id)
+            for title, genre_ids in titles
+            for genre_id in genre_ids
+        )
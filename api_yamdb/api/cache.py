@@ -0,0 +1,205 @@
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from rest_framework.response import Response
+
+from .db import primary_reads, replica_used
+from .models import CacheVersion
+
+RESPONSE_KEY = "api:response:{}"
+HITS_KEY = "api:cache:hits"
+MISSES_KEY = "api:cache:misses"
+
+
+_pending = threading.local()
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счётчика ещё нет. DummyCache не хранит его вовсе, и add()
+        # у него всегда успешен.
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_versions(namespaces):
+    """
+    Версии пространств имён одним запросом к основной базе: метки
+    времени последнего изменения в мс, 0 — пространство не менялось.
+    """
+    found = dict(
+        CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+        .filter(namespace__in=namespaces)
+        .values_list("namespace", "version")
+    )
+    return [found.get(namespace) or 0 for namespace in namespaces]
+
+
+def get_version(namespace):
+    return get_versions([namespace])[0]
+
+
+def bump_versions(namespaces):
+    # Строки упорядочены, чтобы параллельные сдвиги не ждали друг друга
+    # по кругу.
+    namespaces = sorted(set(namespaces))
+    if not namespaces:
+        return
+    now = _now_ms()
+    table = CacheVersion._meta.db_table
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (namespace, version) VALUES "
+            + ", ".join(["(%s, %s)"] * len(namespaces))
+            + " ON CONFLICT (namespace) DO UPDATE SET version = "
+            f"GREATEST({table}.version + 1, EXCLUDED.version)",
+            [value for namespace in namespaces for value in (namespace, now)],
+        )
+
+
+def bump_version_on_commit(namespace):
+    """
+    Сдвигает версию после фиксации транзакции, а не до неё. Все версии
+    транзакции сдвигаются одним запросом, сколько бы строк она ни
+    затронула.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        bump_versions([namespace])
+        return
+    # После отката транзакции обработчика в run_on_commit уже нет, и
+    # накопленные до него пространства имён не сдвигаются.
+    registered = any(
+        func is _bump_pending for _, func in connection.run_on_commit
+    )
+    if not registered:
+        _pending.namespaces = set()
+        transaction.on_commit(_bump_pending)
+    _pending.namespaces.add(namespace)
+
+
+def _bump_pending():
+    namespaces, _pending.namespaces = _pending.namespaces, set()
+    bump_versions(namespaces)
+
+
+def get_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else None,
+    }
+
+
+class VersionedViewMixin:
+    """Привязывает ответы представления к версиям пространств имён."""
+
+    cache_namespaces = ("catalogue",)
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def get_versions(self):
+        # Представление создаётся на каждый запрос, версии читаются раз.
+        if not hasattr(self, "_versions"):
+            self._versions = get_versions(list(self.get_cache_namespaces()))
+        return self._versions
+
+    def get_request_fingerprint(self, request):
+        versions = ":".join(str(version) for version in self.get_versions())
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        url = f"{request.build_absolute_uri(request.path)}?{query}"
+        return hashlib.md5(f"{versions}:{url}".encode()).hexdigest()
+
+
+class CachedResponseMixin(VersionedViewMixin):
+    """
+    Кэширует данные ответов list/retrieve.
+
+    Ключ включает версии пространств имён из cache_namespaces, поэтому
+    любая запись в каталог делает старые ключи недостижимыми.
+    """
+
+    def get_cache_key(self, request):
+        return RESPONSE_KEY.format(self.get_request_fingerprint(request))
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _incr(HITS_KEY)
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        _incr(MISSES_KEY)
+        # Кэш живёт до следующей записи, поэтому заполняется только из
+        # основной базы: отстающая реплика сохранила бы под новой версией
+        # данные до записи.
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """
+    Отдаёт ETag и Last-Modified для list/retrieve и отвечает 304.
+
+    Валидаторы строятся из версий пространств имён, без запроса к базе
+    и без сериализации тела ответа.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _conditional_response(self, handler, request, *args, **kwargs):
+        fingerprint = self.get_request_fingerprint(request)
+        accept = request.META.get("HTTP_ACCEPT", "")
+        etag = '"{}"'.format(
+            hashlib.md5(f"{fingerprint}:{accept}".encode()).hexdigest()
+        )
+        # Пространства, которые ещё не менялись, дают только ETag.
+        last_modified = max(self.get_versions(), default=0) // 1000 or None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        # Тело с отстающей реплики может быть старше версий, из которых
+        # построены валидаторы, и клиент хранил бы его под новым ETag.
+        if response.status_code in (200, 304) and not replica_used():
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
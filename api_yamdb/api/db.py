@@ -0,0 +1,103 @@
+"""
+Чтение с реплик.
+
+ReplicaRouter отправляет чтение на реплики из REPLICA_DATABASES, только
+когда оно разрешено для текущего потока блоком replica_reads(); это
+делает ReplicaRoutingMiddleware для безопасных запросов. Всё остальное:
+запись, команды, фоновые задачи и запросы сразу после записи клиента —
+идёт в основную базу.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from api.metrics import registry
+
+_state = threading.local()
+# Реплика, к которой не удалось подключиться, пропускается до этого
+# момента (time.monotonic()).
+_failed_until = {}
+
+
+@contextmanager
+def replica_reads():
+    """Разрешает чтение с реплики до конца блока в текущем потоке."""
+    _state.allowed = True
+    _state.alias = None
+    try:
+        yield
+    finally:
+        _state.allowed = False
+        _state.alias = None
+
+
+@contextmanager
+def primary_reads():
+    """Читает с основной базы до конца блока, даже внутри replica_reads."""
+    allowed = getattr(_state, "allowed", False)
+    _state.allowed = False
+    try:
+        yield
+    finally:
+        _state.allowed = allowed
+
+
+def replica_used():
+    """Читал ли текущий блок replica_reads что-нибудь с реплики."""
+    alias = getattr(_state, "alias", None)
+    return alias is not None and alias != DEFAULT_DB_ALIAS
+
+
+def get_read_alias():
+    """
+    База для чтения. Реплика выбирается один раз на блок replica_reads,
+    чтобы все запросы одного ответа видели одни и те же данные.
+    """
+    if not getattr(_state, "allowed", False):
+        return DEFAULT_DB_ALIAS
+    if _state.alias is None:
+        _state.alias = choose_replica()
+    return _state.alias
+
+
+def choose_replica():
+    """Случайная доступная реплика или основная база, если их нет."""
+    now = time.monotonic()
+    aliases = [
+        alias
+        for alias in settings.REPLICA_DATABASES
+        if _failed_until.get(alias, 0) <= now
+    ]
+    random.shuffle(aliases)
+    for alias in aliases:
+        try:
+            connections[alias].ensure_connection()
+        except OperationalError:
+            _failed_until[alias] = now + settings.REPLICA_RETRY_SECONDS
+            registry.increment(f"db_replica_failures:{alias}")
+            continue
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+def reset_replicas():
+    _failed_until.clear()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .serializers import DATETIME, STATS_FIELDS, expand_stats, title_stats
+from reviews.models import Title
+
+
+class FastReadMixin:
+    """
+    list/retrieve без сериализаторов.
+
+    Строки выбираются через .values() и превращаются в словари функцией
+    serialize_rows, без создания моделей и полей DRF на каждую строку.
+    Ответ совпадает с ответом обычного сериализатора. Выключается
+    настройкой FAST_SERIALIZERS.
+
+    По умолчанию ответ описывается в fast_fields: поле ответа -> поле
+    .values(), а fast_formats задаёт преобразование значения поля.
+    """
+
+    fast_fields = {}
+    fast_formats = {}
+    fast_values = ()
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_fast_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.serialize_rows(page))
+        return Response(self.serialize_rows(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.FAST_SERIALIZERS:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_fast_queryset(),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(request, row)
+        return Response(self.serialize_rows([row])[0])
+
+    def get_fast_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        values = self.get_fast_values()
+        # Постраничный вывод по ключу берёт ключ из последней строки.
+        key_field = getattr(self.paginator, "key_field", None)
+        if key_field is not None and key_field not in values:
+            values += (key_field,)
+        return queryset.prefetch_related(None).values(*values)
+
+    def get_fast_values(self):
+        return self.fast_values or tuple(self.fast_fields.values())
+
+    def serialize_rows(self, rows):
+        fields = [
+            (name, lookup, self.fast_formats.get(name))
+            for name, lookup in self.fast_fields.items()
+        ]
+        return [
+            {
+                name: row[lookup] if convert is None else convert(row[lookup])
+                for name, lookup, convert in fields
+            }
+            for row in rows
+        ]
+
+
+class FastTitleReadMixin(FastReadMixin):
+    """Формат TitleOutputSerializer, жанры страницы одним запросом."""
+
+    fast_values = (
+        "id",
+        "name",
+        "year",
+        "rating",
+        "description",
+        "category__name",
+        "category__slug",
+    )
+
+    def get_fast_values(self):
+        if expand_stats(self.request):
+            return self.fast_values + STATS_FIELDS
+        return self.fast_values
+
+    def serialize_rows(self, rows):
+        rows = list(rows)
+        with_stats = expand_stats(self.request)
+        genres = defaultdict(list)
+        links = (
+            Title.genre.through.objects.filter(
+                title_id__in=[row["id"] for row in rows]
+            )
+            .order_by("genre_id")
+            .values_list("title_id", "genre__name", "genre__slug")
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append({"name": name, "slug": slug})
+
+        return [
+            self._with_stats(
+                row,
+                with_stats,
+                {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "year": row["year"],
+                    "rating": (
+                        None if row["rating"] is None else int(row["rating"])
+                    ),
+                    "description": row["description"],
+                    "genre": genres[row["id"]],
+                    "category": (
+                        None
+                        if row["category__slug"] is None
+                        else {
+                            "name": row["category__name"],
+                            "slug": row["category__slug"],
+                        }
+                    ),
+                },
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _with_stats(row, with_stats, data):
+        if with_stats:
+            data["stats"] = title_stats(row)
+        return data
+
+
+class FastReviewReadMixin(FastReadMixin):
+    """Формат ReviewSerializer."""
+
+    fast_fields = {
+        "id": "id",
+        "author": "author__username",
+        "text": "text",
+        "score": "score",
+        "pub_date": "pub_date",
+    }
+    fast_formats = {"pub_date": DATETIME.to_representation}
+
+
+class FastCommentReadMixin(FastReadMixin):
+    """Формат CommentSerializer."""
+
+    fast_fields = {
+        "id": "id",
+        "text": "text",
+        "author": "author__username",
+        "pub_date": "pub_date",
+    }
+    fast_formats = {"pub_date": DATETIME.to_representation}
@@ -1,12 +1,19 @@
+import re
+
 import django_filters as filters
-from django.db import models
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections, models
 
+from .slugs import SLUG_CACHES
 from reviews.models import Title
 
+SEARCH_CONFIG = "simple"
+
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name="genre__slug")
-    category = filters.CharFilter(field_name="category__slug")
+    genre = filters.CharFilter(method="filter_slug")
+    category = filters.CharFilter(method="filter_slug")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Title
@@ -19,3 +26,53 @@ class TitleFilter(filters.FilterSet):
                 },
             },
         }
+
+    @staticmethod
+    def filter_slug(queryset, name, value):
+        """
+        Фильтр по slug жанра или категории.
+
+        Slug переводится в id через кэш справочника, поэтому фильтр идёт
+        по внешнему ключу без соединения с таблицей справочника.
+        """
+        model = Title._meta.get_field(name).related_model
+        pk = SLUG_CACHES[model].get_id(value)
+        if pk is None:
+            return queryset.none()
+        return queryset.filter(**{name: pk})
+
+    @staticmethod
+    def filter_search(queryset, name, value):
+        """
+        Поиск по словам названия с сортировкой по релевантности.
+
+        На PostgreSQL ищет по search_vector (GIN-индекс), каждое слово
+        запроса — префикс. На других базах сводится к icontains, выше
+        точное совпадение, затем совпадение начала названия.
+        """
+        if connections[queryset.db].vendor != "postgresql":
+            relevance = models.Case(
+                models.When(name__iexact=value, then=2),
+                models.When(name__istartswith=value, then=1),
+                default=0,
+                output_field=models.FloatField(),
+            )
+            return (
+                queryset.filter(name__icontains=value)
+                .annotate(relevance=relevance)
+                .order_by("-relevance", "id")
+            )
+
+        words = re.findall(r"\w+", value)
+        if not words:
+            return queryset.none()
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            config=SEARCH_CONFIG,
+            search_type="raw",
+        )
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(relevance=SearchRank(models.F("search_vector"), query))
+            .order_by("-relevance", "id")
+        )
@@ -0,0 +1,389 @@
+import json
+import math
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.pagination import PubDateKeysetPagination
+from reviews.models import Review, Title
+from reviews.synthetic import generate_dataset
+from users.models import User
+
+QUERIES_RE = re.compile(r'db;desc="(\d+) queries"')
+BENCH_CODE = "bench"
+# Все запросы замера идут от одного клиента. Проверка лимитов остаётся в
+# замере, но с лимитом, которого замер не достигает.
+UNLIMITED_RATE = "1000000/s"
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures API latency and throughput against a synthetic dataset "
+        "in a throwaway test database"
+    )
+
+    scenarios = (
+        "titles-list",
+        "titles-list-filters",
+        "titles-top",
+        "titles-trending",
+        "title-detail",
+        "reviews-list",
+        "reviews-create",
+        "comments-list",
+        "comments-create",
+        "signup",
+        "token",
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--reviews-per-title", type=int, default=3)
+        parser.add_argument("--comments-per-review", type=int, default=2)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Measured requests per scenario",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Unmeasured requests before each scenario",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=self.scenarios,
+            help="Scenario to run, may be repeated (default: all)",
+        )
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Clear the response cache before every request",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Threads sending measured requests at the same time",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            help="Page size of list endpoints (default: PAGE_SIZE)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write results to a JSON file")
+        parser.add_argument(
+            "--compare", help="Results JSON of an earlier run to compare with"
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be positive")
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be positive")
+        baseline = self._read_baseline(options["compare"])
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        rates = {
+            scope: UNLIMITED_RATE
+            for scope in settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]
+        }
+        try:
+            with override_settings(
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    "DEFAULT_THROTTLE_RATES": rates,
+                }
+            ):
+                results = self._run(options)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        self._report(results, baseline)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Results saved to {options['output']}")
+
+    def _read_baseline(self, path):
+        if not path:
+            return None
+        try:
+            with open(path, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+
+    def _run(self, options):
+        self.rnd = random.Random(options["seed"])
+        started = time.perf_counter()
+        dataset = generate_dataset(
+            titles=options["titles"],
+            users=options["users"],
+            reviews_per_title=options["reviews_per_title"],
+            comments_per_review=options["comments_per_review"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            f"Generated {dataset} in {time.perf_counter() - started:.1f}s"
+        )
+        self._prepare(options)
+        if options["page_size"]:
+            PageNumberPagination.page_size = options["page_size"]
+            PubDateKeysetPagination.page_size = options["page_size"]
+
+        scenarios = options["scenario"] or self.scenarios
+        return {
+            "meta": {
+                "commit": current_commit(),
+                "created": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+                "cold_cache": options["cold_cache"],
+                "concurrency": options["concurrency"],
+                "fast_serializers": settings.FAST_SERIALIZERS,
+                "page_size": PageNumberPagination.page_size,
+                "requests": options["requests"],
+                "warmup": options["warmup"],
+                "seed": options["seed"],
+                "dataset": dataset,
+            },
+            "scenarios": {
+                name: self._measure(name, options) for name in scenarios
+            },
+        }
+
+    def _prepare(self, options):
+        self.titles = list(
+            Title.objects.values_list("id", "year", "category__slug")
+        )
+        self.reviews = list(Review.objects.values_list("title_id", "id"))
+        self.users = list(
+            User.objects.values_list("id", "username").order_by("id")
+        )
+        self.genres = list(
+            Title.genre.through.objects.values_list(
+                "genre__slug", flat=True
+            ).distinct()
+        )
+        self.anonymous = APIClient()
+
+        # Отзыв от автора на произведение может быть только один, поэтому
+        # каждый автор пишет по отзыву на каждое произведение по очереди.
+        per_scenario = options["warmup"] + options["requests"]
+        self.authors = []
+        for index in range(math.ceil(per_scenario / len(self.titles))):
+            author = User.objects.create(
+                username=f"bench{index}", email=f"bench{index}@yamdb.fake"
+            )
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(author)}"
+            )
+            self.authors.append(client)
+
+    def _measure(self, name, options):
+        build = getattr(self, "_" + name.replace("-", "_"))
+        for index in range(options["warmup"]):
+            self._send(build(index), options)
+
+        indices = range(
+            options["warmup"], options["warmup"] + options["requests"]
+        )
+        started = time.perf_counter()
+        if options["concurrency"] == 1:
+            samples = [self._send(build(index), options) for index in indices]
+            busy = sum(elapsed for elapsed, _, _ in samples)
+        else:
+            samples = self._send_concurrently(build, indices, options)
+            busy = time.perf_counter() - started
+
+        timings = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        result = {
+            "requests": len(timings),
+            "errors": options["requests"] - sum(ok for _, ok, _ in samples),
+            "mean_ms": round(sum(timings) / len(timings), 3),
+            "max_ms": round(timings[-1], 3),
+            "rps": round(len(timings) / busy, 1),
+            "queries": round(
+                sum(queries for _, _, queries in samples) / len(timings), 2
+            ),
+        }
+        for percent in PERCENTILES:
+            result[f"p{percent}_ms"] = round(percentile(timings, percent), 3)
+        return result
+
+    def _send(self, request, options):
+        """Отправляет запрос, возвращает время, успех и число запросов."""
+        client, url, data, expected = request
+        if options["cold_cache"]:
+            cache.clear()
+        started = time.perf_counter()
+        if data is None:
+            response = client.get(url)
+        else:
+            response = client.post(url, data, format="json")
+        elapsed = time.perf_counter() - started
+        match = QUERIES_RE.search(response.get("Server-Timing", ""))
+        queries = int(match.group(1)) if match else 0
+        return elapsed, response.status_code == expected, queries
+
+    def _send_concurrently(self, build, indices, options):
+        """
+        Отправляет запросы из --concurrency потоков.
+
+        Как у потоковых воркеров gunicorn, у каждого потока своё
+        соединение с базой; rps считается по общему времени.
+        """
+        indices = iter(indices)
+        lock = threading.Lock()
+        samples = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        index = next(indices, None)
+                        if index is None:
+                            return
+                        request = build(index)
+                    sample = self._send(request, options)
+                    with lock:
+                        samples.append(sample)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples
+
+    def _titles_list(self, index):
+        return self.anonymous, "/api/v1/titles/", None, 200
+
+    def _titles_list_filters(self, index):
+        _, year, category = self.rnd.choice(self.titles)
+        filters = (
+            f"genre={self.rnd.choice(self.genres)}",
+            f"category={category}",
+            f"year={year}",
+            f"genre={self.rnd.choice(self.genres)}&year={year}",
+            f"search=Произведение {self.rnd.randrange(len(self.titles))}",
+        )
+        query = filters[index % len(filters)]
+        return self.anonymous, f"/api/v1/titles/?{query}", None, 200
+
+    def _titles_top(self, index):
+        _, _, category = self.rnd.choice(self.titles)
+        filters = ("", f"?category={category}", f"?genre={self.genres[0]}")
+        url = f"/api/v1/titles/top/{filters[index % len(filters)]}"
+        return self.anonymous, url, None, 200
+
+    def _titles_trending(self, index):
+        return self.anonymous, "/api/v1/titles/trending/", None, 200
+
+    def _title_detail(self, index):
+        title_id = self.rnd.choice(self.titles)[0]
+        return self.anonymous, f"/api/v1/titles/{title_id}/", None, 200
+
+    def _reviews_list(self, index):
+        title_id = self.rnd.choice(self.titles)[0]
+        url = f"/api/v1/titles/{title_id}/reviews/"
+        return self.anonymous, url, None, 200
+
+    def _reviews_create(self, index):
+        title_id = self.titles[index % len(self.titles)][0]
+        client = self.authors[index // len(self.titles)]
+        data = {"text": "Отзыв", "score": self.rnd.randint(1, 10)}
+        return client, f"/api/v1/titles/{title_id}/reviews/", data, 201
+
+    def _comments_list(self, index):
+        title_id, review_id = self.rnd.choice(self.reviews)
+        url = f"/api/v1/titles/{title_id}/reviews/{review_id}/comments/"
+        return self.anonymous, url, None, 200
+
+    def _comments_create(self, index):
+        title_id, review_id = self.rnd.choice(self.reviews)
+        url = f"/api/v1/titles/{title_id}/reviews/{review_id}/comments/"
+        return self.authors[0], url, {"text": "Комментарий"}, 201
+
+    def _signup(self, index):
+        data = {"username": f"signup{index}", "email": f"signup{index}@x.fake"}
+        return self.anonymous, "/api/v1/auth/signup/", data, 200
+
+    def _token(self, index):
+        # Выдача токена сбрасывает код, поэтому он выставляется заново
+        # перед каждым запросом, вне замера.
+        user_id, username = self.users[index % len(self.users)]
+        User.objects.filter(pk=user_id).update(confirmation_code=BENCH_CODE)
+        data = {"username": username, "confirmation_code": BENCH_CODE}
+        return self.anonymous, "/api/v1/auth/token/", data, 200
+
+    def _report(self, results, baseline):
+        previous = baseline["scenarios"] if baseline else {}
+        header = f"{'scenario':<22}" + "".join(
+            f"{column:>10}"
+            for column in ("p50 ms", "p95 ms", "p99 ms", "rps", "queries")
+        )
+        if baseline:
+            header += f"{'p95 diff':>10}"
+        self.stdout.write(header)
+        for name, stats in results["scenarios"].items():
+            line = (
+                f"{name:<22}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                f"{stats['p99_ms']:>10.2f}{stats['rps']:>10.1f}"
+                f"{stats['queries']:>10.2f}"
+            )
+            if name in previous:
+                before = previous[name]["p95_ms"]
+                line += f"{(stats['p95_ms'] - before) / before:>+10.1%}"
+            if stats["errors"]:
+                line += self.style.ERROR(f"  {stats['errors']} errors")
+            self.stdout.write(line)
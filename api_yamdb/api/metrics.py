@@ -0,0 +1,85 @@
+import threading
+from collections import defaultdict
+
+TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        index = next(
+            (i for i, bound in enumerate(self.bounds) if value <= bound),
+            len(self.bounds),
+        )
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "max": round(self.max, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.total_ms = Histogram(TIME_BUCKETS_MS)
+        self.db_ms = Histogram(TIME_BUCKETS_MS)
+        self.app_ms = Histogram(TIME_BUCKETS_MS)
+        self.render_ms = Histogram(TIME_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+
+    def as_dict(self):
+        return {name: value.as_dict() for name, value in vars(self).items()}
+
+
+class MetricsRegistry:
+    """Агрегаты по маршрутам и счётчики в памяти процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteMetrics)
+        self._counters = defaultdict(int)
+
+    def observe(self, route, total_ms, db_ms, app_ms, render_ms, queries):
+        with self._lock:
+            metrics = self._routes[route]
+            metrics.total_ms.observe(total_ms)
+            metrics.db_ms.observe(db_ms)
+            metrics.app_ms.observe(app_ms)
+            metrics.render_ms.observe(render_ms)
+            metrics.queries.observe(queries)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "routes": {
+                    route: metrics.as_dict()
+                    for route, metrics in sorted(self._routes.items())
+                },
+                "counters": dict(self._counters),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._counters.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,142 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from api.db import replica_reads
+from api.metrics import registry
+
+STICKY_COOKIE = "primary_until"
+
+
+class QueryTimer:
+    """execute_wrapper, считающий запросы и время в базе."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Замеряет запрос: число SQL-запросов и время в базе, время кода
+    представления без базы (в основном сериализация), время рендеринга
+    ответа и общее время. Пишет их в Server-Timing и в гистограммы
+    маршрута, которые отдаёт /api/v1/metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        request._metrics = {}
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+
+        marks = request._metrics
+        view_started = marks.get("view_started", started)
+        view_finished = marks.get("view_finished", finished)
+        render_finished = marks.get("render_finished", view_finished)
+
+        total_ms = (finished - started) * 1000
+        db_ms = timer.duration * 1000
+        app_ms = max((view_finished - view_started) * 1000 - db_ms, 0)
+        render_ms = (render_finished - view_finished) * 1000
+
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;desc="{timer.count} queries";dur={db_ms:.1f}',
+                f"app;dur={app_ms:.1f}",
+                f"render;dur={render_ms:.1f}",
+                f"total;dur={total_ms:.1f}",
+            )
+        )
+        registry.observe(
+            self.get_route_name(request),
+            total_ms,
+            db_ms,
+            app_ms,
+            render_ms,
+            timer.count,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics["view_started"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request._metrics["view_finished"] = time.perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: request._metrics.update(
+                render_finished=time.perf_counter()
+            )
+        )
+        return response
+
+    @staticmethod
+    def get_route_name(request):
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return "unresolved"
+        return match.url_name or match.route
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает безопасным запросам читать с реплик.
+
+    После успешной записи клиент на REPLICA_STICKY_SECONDS закрепляется
+    за основной базой, чтобы сразу увидеть свои изменения, пока реплики
+    догоняют. Закрепление хранится в подписанной cookie: её одинаково
+    проверяет любой воркер, а подделать её, чтобы читать только с
+    основной базы, нельзя.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                self.stick(response)
+            return response
+        if self.is_sticky(request):
+            return self.get_response(request)
+        with replica_reads():
+            return self.get_response(request)
+
+    @staticmethod
+    def is_sticky(request):
+        value = request.get_signed_cookie(
+            STICKY_COOKIE,
+            default=None,
+            max_age=settings.REPLICA_STICKY_SECONDS,
+        )
+        return value is not None
+
+    @staticmethod
+    def stick(response):
+        response.set_signed_cookie(
+            STICKY_COOKIE,
+            "1",
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+        )
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class CacheVersion(models.Model):
+    """
+    Версия пространства имён кэша ответов и валидаторов.
+
+    Хранится в базе, а не в кэше процесса: запись из любого воркера,
+    команды загрузки или пересчёта рейтингов видна всем остальным.
+    """
+
+    namespace = models.CharField(max_length=255, primary_key=True)
+    version = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = "версия кэша"
+
+    def __str__(self):
+        return f"{self.namespace}: {self.version}"
@@ -0,0 +1,159 @@
+import math
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по ключу (key_field, id) в порядке ordering.
+
+    Следующая страница выбирается условием по последней записи
+    предыдущей, поэтому нет ни COUNT, ни OFFSET, и стоимость запроса
+    не зависит от глубины. Значения key_field не должны быть NULL.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    key_field = None
+    ordering = ()
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        queryset = self.get_page_queryset(queryset, request)
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_queryset(self, queryset, request):
+        """Строки страницы по курсору, начиная с ключа после курсора."""
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is None:
+            return queryset
+        key, pk = position
+        key_after, id_after = (
+            "lt" if field.startswith("-") else "gt" for field in self.ordering
+        )
+        # Нестрогое условие по ключу дублирует OR ниже, но только оно
+        # задаёт индексу границу диапазона: без него строки до курсора
+        # читались бы и отбрасывались фильтром, как при OFFSET.
+        return queryset.filter(
+            Q(**{f"{self.key_field}__{key_after}": key})
+            | Q(**{self.key_field: key, f"id__{id_after}": pk}),
+            **{f"{self.key_field}__{key_after}e": key},
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        # Быстрый вывод передаёт строки .values() вместо моделей.
+        if isinstance(last, dict):
+            key, pk = last[self.key_field], last["id"]
+        else:
+            key, pk = getattr(last, self.key_field), last.id
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(key, pk),
+        )
+
+    @classmethod
+    def encode_cursor(cls, key, pk):
+        position = f"{cls.format_key(key)}|{pk}"
+        return b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            key, pk = b64decode(encoded.encode()).decode().split("|")
+            key = self.parse_key(key)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return key, pk
+
+    @staticmethod
+    def format_key(key):
+        return str(key)
+
+    @staticmethod
+    def parse_key(text):
+        """Значение ключа из курсора, None или ValueError — неверный."""
+        raise NotImplementedError
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    """Отзывы и комментарии по дате публикации, новые первыми."""
+
+    key_field = "pub_date"
+    ordering = ("-pub_date", "-id")
+
+    @staticmethod
+    def format_key(key):
+        return key.isoformat()
+
+    @staticmethod
+    def parse_key(text):
+        return parse_datetime(text)
+
+
+class RankingKeysetPagination(KeysetPagination):
+    """Выдачи top и trending: по убыванию счёта, при равенстве по id."""
+
+    @staticmethod
+    def format_key(key):
+        # repr() восстанавливает float без потери точности.
+        return repr(key)
+
+    @staticmethod
+    def parse_key(text):
+        key = float(text)
+        return key if math.isfinite(key) else None
+
+
+class TopKeysetPagination(RankingKeysetPagination):
+    key_field = "weighted_rating"
+    ordering = ("-weighted_rating", "id")
+
+
+class TrendingKeysetPagination(RankingKeysetPagination):
+    key_field = "trending_score"
+    ordering = ("-trending_score", "id")
+
+
+class OptionalKeysetPaginationMixin:
+    """Включает PubDateKeysetPagination параметром ?pagination=cursor."""
+
+    pagination_query_param = "pagination"
+
+    @property
+    def pagination_class(self):
+        mode = self.request.query_params.get(self.pagination_query_param)
+        if mode == "cursor":
+            return PubDateKeysetPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
@@ -1,11 +1,42 @@
-from django.db import models
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from .slugs import SLUG_CACHES
+from reviews.models import (
+    SCORE_FIELDS,
+    SCORES,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+)
 from users.models import User
 
+DATETIME = serializers.DateTimeField()
+STATS_FIELDS = ("rating_count", "last_review_date") + SCORE_FIELDS
+
+
+def expand_stats(request):
+    """Запрошена ли статистика отзывов параметром ?expand=stats."""
+    if request is None:
+        return False
+    return "stats" in request.query_params.get("expand", "").split(",")
+
+
+def title_stats(row):
+    """Статистика отзывов из строки Title с полями STATS_FIELDS."""
+    last_review_date = row["last_review_date"]
+    return {
+        "review_count": row["rating_count"],
+        "scores": {str(score): row[f"score_{score}"] for score in SCORES},
+        "last_review_date": (
+            None
+            if last_review_date is None
+            else DATETIME.to_representation(last_review_date)
+        ),
+    }
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,11 +50,31 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ("id",)
 
 
+class CachedSlugRelatedField(SlugRelatedField):
+    """
+    SlugRelatedField для жанров и категорий без запроса на каждый slug.
+
+    Id берётся из кэша справочника, а вместо выборки строки
+    возвращается объект только с id и slug, остальные поля отложены.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (str, int)):
+            self.fail("invalid")
+        queryset = self.get_queryset()
+        pk = SLUG_CACHES[queryset.model].get_id(str(data))
+        if pk is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=data)
+        return queryset.model.from_db(
+            queryset.db, ["id", self.slug_field], [pk, str(data)]
+        )
+
+
 class TitleInputSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
         many=True, slug_field="slug", queryset=Genre.objects.all()
     )
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
         slug_field="slug", queryset=Category.objects.all()
     )
 
@@ -40,10 +91,34 @@ class TitleInputSerializer(serializers.ModelSerializer):
         read_only_fields = ("rating",)
 
 
+class CategoryBulkSerializer(CategorySerializer):
+    class Meta(CategorySerializer.Meta):
+        # Уникальность slug проверяется одним запросом на весь пакет.
+        extra_kwargs = {"slug": {"validators": []}}
+
+
+class GenreBulkSerializer(GenreSerializer):
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {"slug": {"validators": []}}
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент пакета произведений: слаги разрешаются всем пакетом."""
+
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = TitleInputSerializer.Meta.fields
+
+
 class TitleOutputSerializer(serializers.ModelSerializer):
     rating = serializers.IntegerField()
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
+    stats = serializers.SerializerMethodField()
 
     class Meta:
         model = Title
@@ -55,9 +130,21 @@ class TitleOutputSerializer(serializers.ModelSerializer):
             "description",
             "genre",
             "category",
+            "stats",
         )
         read_only_fields = ("rating",)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not expand_stats(self.context.get("request")):
+            self.fields.pop("stats")
+
+    @staticmethod
+    def get_stats(obj):
+        return title_stats(
+            {field: getattr(obj, field) for field in STATS_FIELDS}
+        )
+
 
 class CommentSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(slug_field="username", read_only=True)
@@ -74,30 +161,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ("id", "author", "text", "score", "pub_date")
 
-    def validate(self, data):
-        title = get_object_or_404(
-            Title.objects.prefetch_related(
-                models.Prefetch(
-                    "reviews", queryset=Review.objects.select_related("author")
-                )
-            ),
-            id=self.context["view"].kwargs["title_id"],
-        )
-        author = self.context["request"].user
-        if not self.instance and title.reviews.filter(author=author).exists():
-            raise serializers.ValidationError(
-                f'Ревью на "{title}" от "{author}" уже существует'
-            )
-        return data
-
 
 class UserSerializer(serializers.ModelSerializer):
     @staticmethod
-    def validate_username(value):
+    def validate_me(value):
         if value.lower() == "me":
             raise serializers.ValidationError(
                 f'Имя пользователя "{value}" запрещено!'
             )
+        return value
+
+    @classmethod
+    def validate_username(cls, value):
+        cls.validate_me(value)
         if User.objects.filter(username=value).exists():
             raise serializers.ValidationError(
                 f'Пользователь с именем "{value}" уже существует'
@@ -124,14 +200,46 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
 
+class SignUpSerializer(serializers.ModelSerializer):
+    """
+    Регистрация без запросов к базе при проверке: уникальность имени и
+    email проверяют ограничения таблицы при вставке, см. unique_error.
+    """
+
+    UNIQUE_ERRORS = {
+        "username": 'Пользователь с именем "{username}" уже существует',
+        "email": "Пользователь с таким email уже существует",
+    }
+
+    class Meta:
+        model = User
+        fields = ("username", "email")
+        extra_kwargs = {
+            # Проверку уникальности заменяет ограничение таблицы, формат
+            # имени по-прежнему проверяется.
+            "username": {"validators": [User.username_validator]},
+            "email": {"validators": []},
+        }
+
+    @staticmethod
+    def validate_username(value):
+        return UserSerializer.validate_me(value)
+
+    def unique_error(self, error):
+        """Ошибка валидации по IntegrityError от вставки пользователя."""
+        constraint = getattr(
+            getattr(error.__cause__, "diag", None), "constraint_name", None
+        )
+        for field, message in self.UNIQUE_ERRORS.items():
+            if constraint and field in constraint:
+                return serializers.ValidationError(
+                    {field: [message.format(**self.validated_data)]}
+                )
+        return serializers.ValidationError(
+            "Пользователь с такими данными уже существует"
+        )
+
+
 class UserTokenSerializer(serializers.Serializer):
     username = serializers.CharField()
     confirmation_code = serializers.CharField()
-
-    def validate(self, attrs):
-        username = attrs["username"]
-        request_confirmation_code = attrs["confirmation_code"]
-        user = get_object_or_404(User, username=username)
-        if user.confirmation_code != request_confirmation_code:
-            raise serializers.ValidationError("Неверный confirmation_code!")
-        return attrs
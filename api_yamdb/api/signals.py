@@ -0,0 +1,102 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import forget_auth_state_on_commit
+from api.cache import bump_version_on_commit
+from api.metrics import registry
+from api.slugs import SLUG_CACHES
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import bulk_changed
+from users.models import User
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(bulk_changed, sender=Category)
+@receiver(bulk_changed, sender=Genre)
+@receiver(bulk_changed, sender=Title)
+@receiver(bulk_changed, sender=Title.genre.through)
+@receiver(bulk_changed, sender=Review)
+def invalidate_catalogue(sender, **kwargs):
+    bump_version_on_commit("catalogue")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(bulk_changed, sender=Category)
+@receiver(bulk_changed, sender=Genre)
+def invalidate_slugs(sender, **kwargs):
+    SLUG_CACHES[sender].invalidate_on_commit()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_reviews(sender, instance, **kwargs):
+    bump_version_on_commit(f"reviews:{instance.title_id}")
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_review_comments(sender, instance, **kwargs):
+    # По review_id, а не по произведению: instance.review стоил бы
+    # запроса на каждый комментарий при каскадном удалении.
+    bump_version_on_commit(f"comments:{instance.review_id}")
+
+
+@receiver(bulk_changed, sender=Review)
+@receiver(bulk_changed, sender=Comment)
+@receiver(bulk_changed, sender=User)
+def invalidate_all_reviews(sender, **kwargs):
+    bump_version_on_commit("reviews:all")
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_name(sender, instance, created, **kwargs):
+    # Имя автора выводится в каждом его отзыве и комментарии.
+    loaded = getattr(instance, "_loaded_username", None)
+    if not created and loaded != instance.username:
+        bump_version_on_commit("reviews:all")
+    instance._loaded_username = instance.username
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_state(sender, instance, **kwargs):
+    forget_auth_state_on_commit(instance.pk)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    registry.increment(f"db_connections_created:{connection.alias}")
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """
+    Закрывает сохранённые соединения, которые перестали отвечать.
+
+    Django 2.2 проверяет перед запросом только возраст соединения
+    (CONN_MAX_AGE), а не то, живо ли оно; после рестарта базы или обрыва
+    по таймауту первый запрос воркера упал бы. Этот приёмник подключается
+    после close_old_connections и стоит одного SELECT 1 на соединение.
+    """
+    for connection in connections.all():
+        if not connection.settings_dict.get("CONN_HEALTH_CHECKS"):
+            continue
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            registry.increment(f"db_connections_discarded:{connection.alias}")
+            connection.close()
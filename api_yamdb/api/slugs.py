@@ -0,0 +1,63 @@
+import threading
+
+from .cache import bump_version_on_commit, get_version
+from .db import primary_reads
+from reviews.models import Category, Genre
+
+
+class SlugCache:
+    """
+    Соответствие slug -> id справочника в памяти процесса.
+
+    Справочник загружается целиком при первом обращении и перечитывается,
+    когда меняется версия его пространства имён в базе, поэтому запись
+    в одном воркере или команде сбрасывает копии во всех. Неизвестные слаги
+    дочитываются из базы: объект мог появиться в обход сигналов. Копия
+    живёт до следующей записи, поэтому читается только из основной базы:
+    с отстающей реплики под новой версией осталась бы старая.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.namespace = f"slugs:{model._meta.model_name}"
+        self._lock = threading.Lock()
+        self._version = None
+        self._ids = {}
+
+    def get_ids(self, slugs):
+        """Словарь slug -> id для найденных слагов."""
+        version = get_version(self.namespace)
+        with self._lock, primary_reads():
+            if version != self._version:
+                self._ids = dict(self.model.objects.values_list("slug", "id"))
+                self._version = version
+            ids = self._ids
+
+        missing = [slug for slug in slugs if slug not in ids]
+        if missing:
+            with primary_reads():
+                found = list(
+                    self.model.objects.filter(slug__in=missing).values_list(
+                        "slug", "id"
+                    )
+                )
+            with self._lock:
+                ids.update(found)
+        return {slug: ids[slug] for slug in slugs if slug in ids}
+
+    def get_id(self, slug):
+        return self.get_ids([slug]).get(slug)
+
+    def reset(self):
+        """Сбрасывает копию справочника в этом процессе."""
+        with self._lock:
+            self._version = None
+            self._ids = {}
+
+    def invalidate_on_commit(self):
+        bump_version_on_commit(self.namespace)
+
+
+genre_slugs = SlugCache(Genre)
+category_slugs = SlugCache(Category)
+SLUG_CACHES = {Genre: genre_slugs, Category: category_slugs}
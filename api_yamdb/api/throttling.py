@@ -0,0 +1,137 @@
+"""
+Ограничение частоты запросов алгоритмом token bucket.
+
+У каждого клиента в каждой области (scope) есть ведро на N жетонов,
+которое наполняется со скоростью N за период из DEFAULT_THROTTLE_RATES;
+запрос забирает жетон. Ведро хранится одним числом — моментом, когда
+оно снова станет полным (GCRA), поэтому проверка — одно чтение и одна
+запись в хранилище.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from api.metrics import registry
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+KEY = "throttle:{}:{}"
+
+_stores = {}
+
+
+def parse_rate(rate):
+    """'100/min' -> (100, 60), формат DEFAULT_THROTTLE_RATES DRF."""
+    if rate is None:
+        return None
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class MemoryBucketStore:
+    """
+    Вёдра в памяти процесса, у каждого воркера gunicorn свои.
+
+    Полные вёдра ничем не отличаются от отсутствующих, поэтому при
+    переполнении они выбрасываются.
+    """
+
+    max_keys = 100000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, key, interval, capacity):
+        """Забирает жетон; возвращает 0 или сколько секунд ждать."""
+        now = time.monotonic()
+        with self._lock:
+            full_at = max(self._buckets.get(key, now), now) + interval
+            wait = full_at - now - capacity * interval
+            if wait > 0:
+                return wait
+            if len(self._buckets) >= self.max_keys:
+                self._buckets = {
+                    key: value
+                    for key, value in self._buckets.items()
+                    if value > now
+                }
+            self._buckets[key] = full_at
+            return 0
+
+
+class CacheBucketStore:
+    """
+    Вёдра в кэше Django из THROTTLE_CACHE, общие для всех воркеров,
+    если кэш общий (Redis, Memcached).
+
+    Чтение и запись не атомарны: параллельные запросы одного клиента
+    могут пройти сверх лимита, но не больше, чем их одновременно в пути.
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE]
+
+    def consume(self, key, interval, capacity):
+        now = time.time()
+        full_at = max(self.cache.get(key, now), now) + interval
+        wait = full_at - now - capacity * interval
+        if wait > 0:
+            return wait
+        self.cache.set(key, full_at, timeout=math.ceil(full_at - now))
+        return 0
+
+
+def get_store():
+    """Хранилище из настройки THROTTLE_STORE, одно на процесс."""
+    path = settings.THROTTLE_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def reset_stores():
+    _stores.clear()
+
+
+class ScopedTokenBucketThrottle(BaseThrottle):
+    """
+    Область берётся из throttle_scope представления, иначе read для
+    безопасных методов и write для остальных. Клиент — пользователь,
+    если он аутентифицирован, иначе IP-адрес.
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if scope:
+            return scope
+        return "read" if request.method in SAFE_METHODS else "write"
+
+    def get_client(self, request):
+        user = request.user
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if rate is None:
+            return True
+        count, period = rate
+        self._wait = get_store().consume(
+            KEY.format(scope, self.get_client(request)), period / count, count
+        )
+        if self._wait:
+            registry.increment(f"throttle_rejected:{scope}")
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
@@ -4,7 +4,9 @@ from rest_framework import routers
 from api.views import (
     CategoryViewSet,
     CommentViewSet,
+    ExportView,
     GenreViewSet,
+    MetricsView,
     ReviewViewSet,
     TitleViewSet,
     TokenClaimViewSet,
@@ -32,5 +34,7 @@ router.register("users", UserViewSet)
 urlpatterns = [
     path("v1/auth/signup/", TokenClaimViewSet.as_view()),
     path("v1/auth/token/", UserTokenViewSet.as_view()),
+    path("v1/metrics/", MetricsView.as_view(), name="metrics"),
+    path("v1/export/", ExportView.as_view(), name="export"),
     path("v1/", include(router.urls)),
 ]
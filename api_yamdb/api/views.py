@@ -1,42 +1,74 @@
 import uuid
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db import models
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import permissions, viewsets
+from rest_framework import permissions, serializers, viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import AccessToken
 
+from .authentication import CLAIMS, get_token_claims
+from .bulk import SlugBulkWriteMixin, TitleBulkWriteMixin
+from .cache import CachedResponseMixin, ConditionalGetMixin, get_stats
+from .fast import (
+    FastCommentReadMixin,
+    FastReviewReadMixin,
+    FastTitleReadMixin,
+)
 from .filters import TitleFilter
+from .metrics import registry
+from .pagination import (
+    OptionalKeysetPaginationMixin,
+    TopKeysetPagination,
+    TrendingKeysetPagination,
+)
 from .permissions import AdminOrReadOnly, AuthorOrStaffOrReadOnly, UserOrAdmin
 from .serializers import (
+    STATS_FIELDS,
+    CategoryBulkSerializer,
     CategorySerializer,
     CommentSerializer,
+    GenreBulkSerializer,
     GenreSerializer,
     ReviewSerializer,
+    SignUpSerializer,
+    TitleBulkSerializer,
     TitleInputSerializer,
     TitleOutputSerializer,
     UserSerializer,
     UserTokenSerializer,
+    title_stats,
 )
+from reviews.export import EXPORT_ENTITIES, get_entities, iter_csv, iter_ndjson
 from reviews.models import Category, Comment, Genre, Review, Title
-from users.models import User
+from users.models import OutboxEmail, TokenUser, User
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SlugBulkWriteMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_serializer_class = CategoryBulkSerializer
     lookup_field = "slug"
     search_fields = ("name",)
     permission_classes = (AdminOrReadOnly,)
 
 
 class GenreViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SlugBulkWriteMixin,
     viewsets.mixins.CreateModelMixin,
     viewsets.mixins.DestroyModelMixin,
     viewsets.mixins.ListModelMixin,
@@ -44,20 +76,69 @@ class GenreViewSet(
 ):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = GenreBulkSerializer
     lookup_field = "slug"
     search_fields = ("name",)
     permission_classes = (AdminOrReadOnly,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FastTitleReadMixin,
+    TitleBulkWriteMixin,
+    viewsets.ModelViewSet,
+):
     queryset = (
         Title.objects.select_related("category")
-        .prefetch_related("genre")
-        .annotate(rating=models.Avg("reviews__score"))
+        .prefetch_related(
+            Prefetch("genre", queryset=Genre.objects.order_by("id"))
+        )
+        .order_by("id")
     )
     filter_backends = (DjangoFilterBackend,)
     filter_class = TitleFilter
     permission_classes = (AdminOrReadOnly,)
+    bulk_serializer_class = TitleBulkSerializer
+    # Выдачи листаются по ключу: COUNT по всем произведениям с оценками
+    # стоил бы больше самой страницы.
+    ranking_paginations = {
+        "top": TopKeysetPagination,
+        "trending": TrendingKeysetPagination,
+    }
+
+    @property
+    def pagination_class(self):
+        return self.ranking_paginations.get(
+            self.action, api_settings.DEFAULT_PAGINATION_CLASS
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Условие IS NOT NULL позволяет взять частичный индекс выдачи.
+        if self.action == "top":
+            return queryset.filter(
+                rating_count__gte=settings.RANKING_MIN_REVIEWS,
+                weighted_rating__isnull=False,
+            ).order_by("-weighted_rating", "id")
+        if self.action == "trending":
+            return queryset.filter(trending_score__isnull=False).order_by(
+                "-trending_score", "id"
+            )
+        return queryset
+
+    @action(detail=False, methods=["GET"])
+    def top(self, request):
+        """
+        Лучшие по взвешенному рейтингу, фильтры genre и category те же,
+        что у списка.
+        """
+        return self.list(request)
+
+    @action(detail=False, methods=["GET"])
+    def trending(self, request):
+        """Больше всего свежих отзывов, старые отзывы весят меньше."""
+        return self.list(request)
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -65,11 +146,38 @@ class TitleViewSet(viewsets.ModelViewSet):
         else:
             return TitleOutputSerializer
 
+    @action(detail=True, methods=["GET"])
+    def stats(self, request, pk=None):
+        """Гистограмма оценок и счётчики отзывов одним запросом к Title."""
+        row = get_object_or_404(
+            Title.objects.values("id", "rating", *STATS_FIELDS), pk=pk
+        )
+        rating = row["rating"]
+        return Response(
+            {
+                "id": row["id"],
+                "rating": None if rating is None else int(rating),
+                **title_stats(row),
+            }
+        )
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin,
+    OptionalKeysetPaginationMixin,
+    FastCommentReadMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = (AuthorOrStaffOrReadOnly,)
     serializer_class = CommentSerializer
 
+    def get_cache_namespaces(self):
+        return (
+            "reviews:all",
+            f"reviews:{self.kwargs['title_id']}",
+            f"comments:{self.kwargs['review_id']}",
+        )
+
     def get_queryset(self):
         return Comment.objects.filter(
             review__title_id=self.kwargs.get("title_id"),
@@ -85,9 +193,20 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user, review=review)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin,
+    OptionalKeysetPaginationMixin,
+    FastReviewReadMixin,
+    viewsets.ModelViewSet,
+):
     serializer_class = ReviewSerializer
     permission_classes = (AuthorOrStaffOrReadOnly,)
+    # Имя ограничения из Review.Meta.constraints.
+    unique_constraint = "unique review"
+
+    def get_cache_namespaces(self):
+        # reviews:all сдвигают смена имени автора и пакетные загрузки.
+        return ("reviews:all", f"reviews:{self.kwargs['title_id']}")
 
     def get_queryset(self):
         return Review.objects.filter(
@@ -96,7 +215,25 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs["title_id"])
-        serializer.save(author=self.request.user, title=title)
+        author = self.request.user
+        # Повтор отзыва отсекает ограничение "unique review" в базе,
+        # без предварительной выборки отзывов произведения.
+        try:
+            with transaction.atomic():
+                serializer.save(author=author, title=title)
+        except IntegrityError as error:
+            constraint = getattr(
+                getattr(error.__cause__, "diag", None), "constraint_name", None
+            )
+            if constraint != self.unique_constraint:
+                raise
+            raise serializers.ValidationError(
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        f'Ревью на "{title}" от "{author}" уже существует'
+                    ]
+                }
+            )
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -115,54 +252,133 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def me(self, request):
+        user = request.user
+        if isinstance(user, TokenUser):
+            # Пользователь собран из токена, профиль читается из базы.
+            user = get_object_or_404(User, pk=user.pk)
         if request.method == "GET":
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
         else:
             data = {k: request.data[k] for k in request.data if k != "role"}
-            serializer = self.get_serializer(
-                request.user, data=data, partial=True
-            )
+            serializer = self.get_serializer(user, data=data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
         return Response(serializer.data)
 
 
 class TokenClaimViewSet(APIView):
-    serializer_class = UserSerializer
+    serializer_class = SignUpSerializer
     authentication_classes = []
     permission_classes = []
+    throttle_scope = "signup"
 
     @staticmethod
     def _get_confirmation_code():
-        return str(uuid.uuid4())
+        # Поле confirmation_code ограничено 10 символами.
+        return uuid.uuid4().hex[:10]
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         confirmation_code = self._get_confirmation_code()
-        user = serializer.save(confirmation_code=confirmation_code)
-        send_mail(
-            "Confirmation code",
-            confirmation_code,
-            settings.EMAIL_FROM,
-            [user.email],
-        )
-        return Response(request.data)
+        # Письмо отправит send_outbox, ответ не ждёт почтового сервера.
+        try:
+            with transaction.atomic():
+                user = serializer.save(confirmation_code=confirmation_code)
+                OutboxEmail.objects.create(
+                    subject="Confirmation code",
+                    body=confirmation_code,
+                    from_email=settings.EMAIL_FROM,
+                    to=user.email,
+                )
+        except IntegrityError as error:
+            raise serializer.unique_error(error)
+        return Response(serializer.data)
 
 
 class UserTokenViewSet(APIView):
     serializer_class = UserTokenSerializer
     permission_classes = []
+    throttle_scope = "token"
 
     @classmethod
     def get_token(cls, user):
-        return AccessToken.for_user(user)
+        token = AccessToken.for_user(user)
+        token.payload.update(get_token_claims(user))
+        return token
 
     def post(self, request, *args, **kwargs):
+        """
+        Выдаёт токен за два запроса: пользователь читается с полями для
+        токена, код проверяется и сбрасывается одним условным UPDATE,
+        поэтому один код нельзя использовать дважды даже параллельно.
+        """
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        username = serializer.validated_data["username"]
-        user = get_object_or_404(User, username=username)
-        token = self.get_token(user)
-        user.remove_confirmation_code()
-        return Response({"token": str(token)})
+        user = get_object_or_404(
+            User.objects.only("id", *CLAIMS),
+            username=serializer.validated_data["username"],
+        )
+        used = (
+            User.objects.filter(
+                pk=user.pk,
+                confirmation_code=serializer.validated_data[
+                    "confirmation_code"
+                ],
+            )
+            .exclude(confirmation_code="")
+            .update(confirmation_code="")
+        )
+        if not used:
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Неверный confirmation_code!"]}
+            )
+        return Response({"token": str(self.get_token(user))})
+
+
+class MetricsView(APIView):
+    permission_classes = (UserOrAdmin,)
+
+    def get(self, request):
+        metrics = registry.snapshot()
+        metrics["cache"] = get_stats()
+        return Response(metrics)
+
+
+class ExportView(APIView):
+    """
+    Выгрузка всего каталога потоком для зеркал партнёров.
+
+    ?output=ndjson (по умолчанию) отдаёт все сущности одним потоком,
+    ?reviews=1 добавляет отзывы. ?output=csv&entity=titles отдаёт одну
+    сущность. Формат совпадает с файлами load_entity.
+    """
+
+    permission_classes = (UserOrAdmin,)
+
+    def get(self, request):
+        output = request.query_params.get("output", "ndjson")
+        if output == "ndjson":
+            reviews = request.query_params.get("reviews") in ("1", "true")
+            response = StreamingHttpResponse(
+                iter_ndjson(get_entities(reviews)),
+                content_type="application/x-ndjson",
+            )
+            filename = "catalogue.ndjson"
+        elif output == "csv":
+            entity = request.query_params.get("entity")
+            if entity not in EXPORT_ENTITIES:
+                choices = ", ".join(EXPORT_ENTITIES)
+                raise serializers.ValidationError(
+                    {"entity": [f"Допустимые значения: {choices}"]}
+                )
+            response = StreamingHttpResponse(
+                iter_csv(entity), content_type="text/csv"
+            )
+            filename = f"{entity}.csv"
+        else:
+            raise serializers.ValidationError(
+                {"output": ["Допустимые значения: ndjson, csv"]}
+            )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -1,7 +1,11 @@
 import os
 
-from django.core.asgi import get_asgi_application
+from asgiref.wsgi import WsgiToAsgi
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
 
-application = get_asgi_application()
+# В Django 2.2 нет django.core.asgi и асинхронных представлений, поэтому
+# ASGI-сервер получает WSGI-приложение, которое asgiref выполняет в пуле
+# потоков. Ответы те же, что у gunicorn.
+application = WsgiToAsgi(get_wsgi_application())
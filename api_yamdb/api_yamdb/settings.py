@@ -27,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.RequestMetricsMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,6 +60,14 @@ TEMPLATES = [
 WSGI_APPLICATION = "api_yamdb.wsgi.application"
 
 
+# Сколько секунд соединение с базой живёт между запросами: 0 — закрывать
+# после каждого запроса, none — без ограничения. При CONN_HEALTH_CHECKS
+# соединение проверяется перед повторным использованием, см. api/signals.py.
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', default='60')
+DB_CONN_MAX_AGE = (
+    None if DB_CONN_MAX_AGE.lower() == 'none' else int(DB_CONN_MAX_AGE)
+)
+
 DATABASES = {
     'default': {
         'ENGINE': os.getenv(
@@ -83,10 +93,71 @@ DATABASES = {
         'PORT': os.getenv(
             'DB_PORT',
             default='5432'
-        )
+        ),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS',
+            default='1'
+        ) == '1',
+    }
+}
+
+# Реплики для чтения: DB_REPLICAS=host[:port],... Остальные параметры
+# подключения те же, что у основной базы. Безопасные запросы читают со
+# случайной реплики, см. api/db.py; после записи клиент на
+# REPLICA_STICKY_SECONDS остаётся на основной базе, недоступная реплика
+# пропускается REPLICA_RETRY_SECONDS.
+REPLICA_DATABASES = []
+for index, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1
+):
+    host, _, port = replica.strip().partition(':')
+    REPLICA_DATABASES.append(f'replica_{index}')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.db.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default=10))
+REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', default=30))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default="yamdb"),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", default=300)),
     }
 }
 
+# Сколько секунд кэшируются роль и статус пользователя для проверки
+# токенов; смена роли через ORM сбрасывает кэш сразу.
+AUTH_STATE_TIMEOUT = int(os.getenv("AUTH_STATE_TIMEOUT", default=60))
+
+# Наибольший размер пакета для эндпоинтов .../bulk/.
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", default=1000))
+
+# Выдача /titles/top/: байесовский рейтинг с RATING_PRIOR_WEIGHT
+# априорными оценками RATING_PRIOR_MEAN, в выдачу попадают произведения
+# с RANKING_MIN_REVIEWS отзывами и больше. /titles/trending/: вклад отзыва
+# убывает вдвое за TRENDING_HALF_LIFE_DAYS дней. После изменения
+# RATING_PRIOR_* и TRENDING_HALF_LIFE_DAYS выполните refresh_rankings.
+RATING_PRIOR_MEAN = float(os.getenv("RATING_PRIOR_MEAN", default=5.5))
+RATING_PRIOR_WEIGHT = float(os.getenv("RATING_PRIOR_WEIGHT", default=10))
+RANKING_MIN_REVIEWS = int(os.getenv("RANKING_MIN_REVIEWS", default=1))
+TRENDING_HALF_LIFE_DAYS = float(
+    os.getenv("TRENDING_HALF_LIFE_DAYS", default=7)
+)
+
+# Чтение произведений, отзывов и комментариев без сериализаторов DRF,
+# см. api/fast.py. FAST_SERIALIZERS=0 возвращает обычные сериализаторы.
+FAST_SERIALIZERS = os.getenv("FAST_SERIALIZERS", default="1") == "1"
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -136,10 +207,31 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.StatelessJWTAuthentication",
+    ),
+    # Token bucket на клиента: N запросов за период с мгновенным запасом
+    # N, см. api/throttling.py. Пустая переменная окружения снимает лимит.
+    # Перед gunicorn стоит nginx: IP клиента берётся из последнего адреса,
+    # который nginx дописал в X-Forwarded-For.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", default=1)),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "api.throttling.ScopedTokenBucketThrottle",
     ),
+    "DEFAULT_THROTTLE_RATES": {
+        "signup": os.getenv("THROTTLE_SIGNUP", default="20/hour") or None,
+        "token": os.getenv("THROTTLE_TOKEN", default="30/min") or None,
+        "read": os.getenv("THROTTLE_READ", default="1200/min") or None,
+        "write": os.getenv("THROTTLE_WRITE", default="120/min") or None,
+    },
 }
 
+# Хранилище вёдер: MemoryBucketStore — в памяти воркера, CacheBucketStore
+# — в кэше THROTTLE_CACHE, общем для воркеров при Redis или Memcached.
+THROTTLE_STORE = os.getenv(
+    "THROTTLE_STORE", default="api.throttling.MemoryBucketStore"
+)
+THROTTLE_CACHE = os.getenv("THROTTLE_CACHE", default="default")
+
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+import sys
+
+# Потоковые воркеры: пока один поток ждёт ответа PostgreSQL, остальные
+# обслуживают другие запросы. Каждый поток держит своё постоянное
+# соединение с базой (DB_CONN_MAX_AGE), поэтому на воркер приходится
+# до GUNICORN_THREADS соединений.
+bind = os.getenv("GUNICORN_BIND", default="0:8000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", default="gthread")
+# Кэш ответов и статус пользователей хранятся в кэше Django. С кэшем в
+# памяти процесса воркеры не видят записей друг друга и отдают устаревшие
+# данные, поэтому без общего кэша (Memcached, Redis, база, файлы) воркер
+# один.
+PROCESS_LOCAL_CACHES = ("LocMemCache", "DummyCache")
+cache_backend = os.getenv("CACHE_BACKEND") or "LocMemCache"
+shared_cache = not cache_backend.endswith(PROCESS_LOCAL_CACHES)
+workers = int(
+    os.getenv(
+        "GUNICORN_WORKERS",
+        default=multiprocessing.cpu_count() + 1 if shared_cache else 1,
+    )
+)
+if not shared_cache and workers > 1:
+    sys.stderr.write(
+        f"GUNICORN_WORKERS={workers} needs a shared CACHE_BACKEND, "
+        "starting 1 worker\n"
+    )
+    workers = 1
+threads = int(os.getenv("GUNICORN_THREADS", default=8))
+# Медленных клиентов буферизует nginx, поэтому keep-alive с ним короткий.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", default=5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", default=30))
@@ -0,0 +1,87 @@
+"""
+Потоковая выгрузка каталога.
+
+Строки идут в формате файлов load_entity: у каждой сущности те же имена
+и колонки, ссылки на другие сущности — по id. Выгрузку можно загрузить
+обратно командой load_entity --source. Рейтинг и статистика отзывов
+не выгружаются: при загрузке они считаются заново из отзывов.
+"""
+import csv
+import json
+
+from reviews.models import Category, Genre, Review, Title
+
+EXPORT_ENTITIES = {
+    "category": (Category, ("id", "name", "slug")),
+    "genre": (Genre, ("id", "name", "slug")),
+    "titles": (Title, ("id", "name", "year", "description", "category")),
+    "genre_title": (Title.genre.through, ("id", "title_id", "genre_id")),
+    "review": (
+        Review,
+        ("id", "title_id", "text", "author", "score", "pub_date"),
+    ),
+}
+CATALOGUE_ENTITIES = ("category", "genre", "titles", "genre_title")
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Буфер для csv.writer, который просто возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def get_entities(reviews=False):
+    return CATALOGUE_ENTITIES + ("review",) if reviews else CATALOGUE_ENTITIES
+
+
+def iter_values(entity):
+    """
+    Строки сущности серверным курсором, по CHUNK_SIZE за раз.
+
+    Даты переводятся в ISO 8601, остальные значения отдаются как есть.
+    """
+    model, columns = EXPORT_ENTITIES[entity]
+    queryset = model.objects.order_by("id").values_list(*columns)
+    for values in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in values
+        ]
+
+
+def _chunked(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def iter_ndjson(entities):
+    """Все сущности одним потоком, по объекту JSON на строку."""
+
+    def lines():
+        for entity in entities:
+            columns = EXPORT_ENTITIES[entity][1]
+            for values in iter_values(entity):
+                row = {"entity": entity, **dict(zip(columns, values))}
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    return _chunked(lines())
+
+
+def iter_csv(entity):
+    """Одна сущность в CSV с заголовком, пустая строка вместо NULL."""
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(EXPORT_ENTITIES[entity][1])
+        for values in iter_values(entity):
+            yield writer.writerow(values)
+
+    return _chunked(lines())
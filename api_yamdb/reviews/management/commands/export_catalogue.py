@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.export import get_entities, iter_csv, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = "Streams the catalogue as NDJSON or CSV readable by load_entity"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=("ndjson", "csv"), default="ndjson"
+        )
+        parser.add_argument(
+            "--reviews", action="store_true", help="Export reviews too"
+        )
+        parser.add_argument(
+            "--output",
+            help="NDJSON file (default: stdout) or directory for CSV files",
+        )
+
+    def handle(self, *args, **options):
+        entities = get_entities(options["reviews"])
+        if options["format"] == "ndjson":
+            self._write_ndjson(entities, options["output"])
+            return
+
+        if not options["output"]:
+            raise CommandError("CSV export needs --output directory")
+        os.makedirs(options["output"], exist_ok=True)
+        for entity in entities:
+            path = os.path.join(options["output"], f"{entity}.csv")
+            with open(path, "w", encoding="utf-8", newline="") as file:
+                file.writelines(iter_csv(entity))
+            self.stderr.write(f"Exported {entity} to {path}")
+
+    def _write_ndjson(self, entities, path):
+        if not path:
+            for chunk in iter_ndjson(entities):
+                self.stdout.write(chunk, ending="")
+            return
+        with open(path, "w", encoding="utf-8") as file:
+            file.writelines(iter_ndjson(entities))
@@ -1,11 +1,33 @@
 import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import chain, islice
 
 from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
 
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import bulk_changed
 from users.models import User
 
+DATA_DIR = os.path.join(settings.STATIC_ROOT, "data")
+
+
+def _load_in_worker(entity_name, options):
+    # Дочерний процесс не должен пользоваться сокетом родителя.
+    connections.close_all()
+    try:
+        Command()._load_entity(entity_name, options)
+    finally:
+        connections.close_all()
+
 
 class Command(BaseCommand):
     help = "Loads category entities to db from csv file"
@@ -20,8 +42,51 @@ class Command(BaseCommand):
         "comments": Comment,
     }
 
+    # CSV-колонки со ссылками на другие сущности: (поле модели, модель).
+    related_columns = {
+        Title: {"category": ("category_id", Category)},
+        Title.genre.through: {
+            "title_id": ("title_id", Title),
+            "genre_id": ("genre_id", Genre),
+        },
+        Review: {
+            "title_id": ("title_id", Title),
+            "author": ("author_id", User),
+        },
+        Comment: {
+            "review_id": ("review_id", Review),
+            "author": ("author_id", User),
+        },
+    }
+
+    # Производные колонки старых выгрузок: они считаются из отзывов, и
+    # запись без rating_sum и rating_count рассогласовала бы статистику.
+    derived_columns = {Title: ("rating",)}
+
     def add_arguments(self, parser):
         parser.add_argument("entity_name", nargs="+", type=str)
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Load rows with bulk_create/bulk_update in chunks",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per chunk and transaction in bulk mode",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Load independent entities in this many processes",
+        )
+        parser.add_argument(
+            "--source",
+            help="Directory with <entity>.csv files or an NDJSON file made "
+            "by export_catalogue (default: static/data)",
+        )
 
     def handle(self, *args, **options):
         if options["entity_name"] == ["all"]:
@@ -29,40 +94,228 @@ class Command(BaseCommand):
             self.stdout.write(f"Loading entities: {entities_to_load}.")
             options["entity_name"] = entities_to_load
 
-        for entity_name in options["entity_name"]:
+        if options["jobs"] > 1 and len(options["entity_name"]) > 1:
+            self._load_parallel(options["entity_name"], options)
+        else:
+            for entity_name in options["entity_name"]:
+                self._load_entity(entity_name, options)
+
+        if len(options["entity_name"]) > 1:
             self.stdout.write("")
-            self.stdout.write(f'Loading entity "{entity_name}"...')
+            self.stdout.write(self.style.SUCCESS("All entities are loaded!"))
 
-            if entity_name not in self.supported_entities:
-                error_msg = (
-                    f'Error: Entity "{entity_name}" is not supported!'
-                    f" Supported entities are "
-                    f"{list(self.supported_entities.keys())}"
-                )
-                self.stdout.write(self.style.ERROR(error_msg))
-                continue
+    def _load_entity(self, entity_name, options):
+        self.stdout.write("")
+        self.stdout.write(f'Loading entity "{entity_name}"...')
 
-            model = self.supported_entities[entity_name]
-            file_path = f"{settings.STATICFILES_DIRS[0]}data/{entity_name}.csv"
+        if entity_name not in self.supported_entities:
+            error_msg = (
+                f'Error: Entity "{entity_name}" is not supported!'
+                f" Supported entities are "
+                f"{list(self.supported_entities.keys())}"
+            )
+            self.stdout.write(self.style.ERROR(error_msg))
+            return
 
-            with open(file_path, newline="") as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
+        model = self.supported_entities[entity_name]
+        source = options["source"] or DATA_DIR
+
+        if options["bulk"]:
+            self._bulk_load(entity_name, model, source, options["batch_size"])
+        else:
+            with self._open_rows(entity_name, model, source) as (_, rows):
+                for row in rows:
                     row = self._fill_row_with_related_entities(row, model)
                     if row:
                         model.objects.update_or_create(**row)
-
             self.stdout.write(
                 self.style.SUCCESS(f'Loaded entity "{entity_name}".')
             )
+        # Пакетная вставка и строки genre_title проходят мимо сигналов
+        # моделей, а кэш ответов и слагов должен увидеть новые данные.
+        bulk_changed.send(sender=model)
 
-        if len(options["entity_name"]) > 1:
-            self.stdout.write("")
-            self.stdout.write(self.style.SUCCESS("All entities are loaded!"))
+    def _build_dependencies(self, entity_names):
+        """Сущности, на модели которых ссылаются FK каждой сущности."""
+        entity_by_model = {
+            self.supported_entities[name]: name
+            for name in entity_names
+            if name in self.supported_entities
+        }
+        dependencies = {name: set() for name in entity_names}
+        for model, name in entity_by_model.items():
+            for field in model._meta.concrete_fields:
+                target = entity_by_model.get(field.related_model)
+                if field.many_to_one and target and target != name:
+                    dependencies[name].add(target)
+        return dependencies
+
+    def _load_parallel(self, entity_names, options):
+        pending = self._build_dependencies(entity_names)
+        loaded = set()
+        running = {}
+        # Воркеры получают копию процесса через fork, поэтому соединения
+        # родителя закрываются заранее: каждый откроет собственное.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(options["jobs"], mp_context=context) as pool:
+            while pending or running:
+                ready = [
+                    name for name, deps in pending.items() if deps <= loaded
+                ]
+                for name in ready:
+                    del pending[name]
+                    future = pool.submit(_load_in_worker, name, options)
+                    running[future] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    loaded.add(running.pop(future))
+
+    def _bulk_load(self, entity_name, model, source, batch_size):
+        related = self.related_columns.get(model, {})
+        known_ids = {
+            column: set(related_model.objects.values_list("id", flat=True))
+            for column, (_, related_model) in related.items()
+        }
+        existing_ids = set(model.objects.values_list("id", flat=True))
+        loaded = skipped = 0
+        started = time.monotonic()
+
+        with self._open_rows(entity_name, model, source) as (columns, rows):
+            update_fields = [
+                related[column][0] if column in related else column
+                for column in columns
+                if column != "id"
+            ]
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                new_objects, existing_objects = [], []
+                for row in chunk:
+                    obj = self._build_object(model, row, related, known_ids)
+                    if obj is None:
+                        skipped += 1
+                    elif obj.id in existing_ids:
+                        existing_objects.append(obj)
+                    else:
+                        new_objects.append(obj)
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        new_objects, ignore_conflicts=True
+                    )
+                    if existing_objects and update_fields:
+                        model.objects.bulk_update(
+                            existing_objects, update_fields
+                        )
+                existing_ids.update(obj.id for obj in new_objects)
+                loaded += len(new_objects) + len(existing_objects)
+
+        self._reset_sequences(model)
+        if model == Review:
+            Title.objects.recalculate_ratings()
+
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else loaded
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Loaded entity "{entity_name}": {loaded} rows, '
+                f"{skipped} skipped, {elapsed:.2f}s ({rate:.0f} rows/sec)."
+            )
+        )
+
+    @contextmanager
+    def _open_rows(self, entity_name, model, source):
+        """
+        Колонки и строки сущности без производных колонок: из
+        <source>/<entity>.csv, если source — каталог, иначе из выгрузки
+        NDJSON. Строки читаются по одной.
+        """
+        derived = self.derived_columns.get(model, ())
+        with self._read_rows(entity_name, model, source) as (columns, rows):
+            if derived:
+                columns = [name for name in columns if name not in derived]
+                rows = (
+                    {
+                        name: value
+                        for name, value in row.items()
+                        if name not in derived
+                    }
+                    for row in rows
+                )
+            yield columns, rows
+
+    @contextmanager
+    def _read_rows(self, entity_name, model, source):
+        if os.path.isdir(source):
+            file_path = os.path.join(source, f"{entity_name}.csv")
+            with open(file_path, newline="") as csvfile:
+                reader = csv.DictReader(csvfile)
+                rows = (self._clean_csv_row(model, row) for row in reader)
+                yield reader.fieldnames, rows
+            return
+
+        with open(source, encoding="utf-8") as ndjson:
+            rows = self._read_ndjson(ndjson, entity_name)
+            first = next(rows, None)
+            if first is None:
+                yield [], iter(())
+            else:
+                yield list(first), chain([first], rows)
+
+    @staticmethod
+    def _read_ndjson(lines, entity_name):
+        for line in lines:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.pop("entity", None) == entity_name:
+                yield row
+
+    @staticmethod
+    def _clean_csv_row(model, row):
+        # В CSV нет NULL: пустая строка в nullable-поле означает None.
+        for column, value in row.items():
+            if value != "":
+                continue
+            try:
+                field = model._meta.get_field(column)
+            except FieldDoesNotExist:
+                continue
+            if field.null:
+                row[column] = None
+        return row
+
+    @staticmethod
+    def _build_object(model, row, related, known_ids):
+        values = {}
+        for column, value in row.items():
+            if column not in related:
+                values[column] = value
+                continue
+            field_name, _ = related[column]
+            if value is None:
+                values[field_name] = None
+                continue
+            related_id = int(value)
+            if related_id not in known_ids[column]:
+                return None
+            values[field_name] = related_id
+        values["id"] = int(values["id"])
+        return model(**values)
+
+    @staticmethod
+    def _reset_sequences(model):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                cursor.execute(sql)
 
     @staticmethod
     def _process_title_row(row):
         category_id = row["category"]
+        if category_id is None:
+            return row
         category = Category.objects.get(id=category_id)
         if not category:
             return None
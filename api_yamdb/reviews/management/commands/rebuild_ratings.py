@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.signals import bulk_changed
+
+
+class Command(BaseCommand):
+    help = "Rebuilds title ratings, statistics and rankings from reviews"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.recalculate_ratings()
+            bulk_changed.send(sender=Title)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt ratings for {updated} titles.")
+        )
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:44
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_CONFIG = 'pg_catalog.simple'
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX title_search_vector_idx ON reviews_title '
+        'USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        'CREATE TRIGGER title_search_vector_update '
+        'BEFORE INSERT OR UPDATE OF name ON reviews_title '
+        'FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger('
+        f'search_vector, {SEARCH_CONFIG!r}, name)'
+    )
+    schema_editor.execute(
+        'UPDATE reviews_title '
+        f'SET search_vector = to_tsvector({SEARCH_CONFIG!r}, name)'
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP TRIGGER IF EXISTS title_search_vector_update ON reviews_title'
+    )
+    schema_editor.execute('DROP INDEX IF EXISTS title_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+def fill_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    histograms = {}
+    counts = (
+        Review.objects.order_by()
+        .values('title', 'score')
+        .annotate(count=models.Count('id'))
+    )
+    for row in counts:
+        histograms.setdefault(row['title'], {})[
+            f'score_{row["score"]}'
+        ] = row['count']
+    last_dates = (
+        Review.objects.order_by()
+        .values('title')
+        .annotate(last=models.Max('pub_date'))
+    )
+    for row in last_dates:
+        Title.objects.filter(pk=row['title']).update(
+            last_review_date=row['last'], **histograms.get(row['title'], {})
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='last_review_date',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='дата последнего отзыва'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 1'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_10',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 10'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 2'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 3'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 4'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 5'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 6'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 7'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 8'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число оценок 9'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:12
+
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+TRENDING_EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+def fill_rankings(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    weight = settings.RATING_PRIOR_WEIGHT
+    scale = settings.TRENDING_HALF_LIFE_DAYS * 24 * 60 * 60 / math.log(2)
+    positions = {}
+    reviews = Review.objects.values_list('title', 'pub_date').iterator()
+    for title, pub_date in reviews:
+        positions.setdefault(title, []).append(
+            (pub_date - TRENDING_EPOCH).total_seconds() / scale
+        )
+    titles = Title.objects.filter(rating_count__gt=0).only(
+        'rating_sum', 'rating_count'
+    )
+    for title in titles.iterator():
+        title.weighted_rating = (
+            title.rating_sum + weight * settings.RATING_PRIOR_MEAN
+        ) / (title.rating_count + weight)
+        top = max(positions.get(title.pk, [0]))
+        title.trending_score = top + math.log(sum(
+            math.exp(position - top)
+            for position in positions.get(title.pk, [top])
+        ))
+        title.save(update_fields=['weighted_rating', 'trending_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='trending_score',
+            field=models.FloatField(editable=False, null=True, verbose_name='популярность'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-weighted_rating', 'id'], name='title_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-weighted_rating', 'id'], name='title_category_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-trending_score', 'id'], name='title_trending_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
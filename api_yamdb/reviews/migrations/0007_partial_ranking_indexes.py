@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_rankings'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_top_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_category_top_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_trending_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(weighted_rating__isnull=False), fields=['-weighted_rating', 'id'], name='title_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(weighted_rating__isnull=False), fields=['category', '-weighted_rating', 'id'], name='title_category_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(trending_score__isnull=False), fields=['-trending_score', 'id'], name='title_trending_idx'),
+        ),
+    ]
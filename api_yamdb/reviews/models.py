@@ -1,6 +1,19 @@
+import math
+from datetime import datetime
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import (
+    Abs,
+    Cast,
+    Coalesce,
+    Exp,
+    Greatest,
+    Ln,
+)
 from django.utils import timezone
 
 from reviews.validators import year_validator
@@ -34,6 +47,214 @@ class Genre(models.Model):
         return self.name
 
 
+SCORES = range(1, 11)
+SCORE_FIELDS = tuple(f"score_{score}" for score in SCORES)
+# Начало отсчёта для trending_score, см. trending_position.
+TRENDING_EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+# exp() в PostgreSQL падает с underflow ниже примерно -745.
+MIN_EXPONENT = -700
+# Отзыв ближе этого к trending_score произведения даёт почти весь счёт:
+# вычитать его вклад неточно, счёт пересчитывается заново.
+TRENDING_PRECISION = 0.01
+
+
+class Epoch(models.Func):
+    """Секунды от начала эпохи Unix для даты со временем."""
+
+    template = "EXTRACT(EPOCH FROM %(expressions)s)::double precision"
+    output_field = models.FloatField()
+
+
+def trending_scale():
+    """Секунды на единицу trending_score: период полураспада / ln 2."""
+    return settings.TRENDING_HALF_LIFE_DAYS * 24 * 60 * 60 / math.log(2)
+
+
+def trending_position(moment):
+    """Момент времени в единицах trending_score от TRENDING_EPOCH."""
+    return (moment - TRENDING_EPOCH).total_seconds() / trending_scale()
+
+
+def weighted_rating(rating_sum, rating_count):
+    """
+    Байесовский рейтинг: среднее оценок, к которым добавлено
+    RATING_PRIOR_WEIGHT оценок RATING_PRIOR_MEAN. У произведений с парой
+    отзывов он близок к априорному среднему, у популярных — к рейтингу.
+    """
+    weight = settings.RATING_PRIOR_WEIGHT
+    return (
+        Cast(rating_sum, models.FloatField())
+        + weight * settings.RATING_PRIOR_MEAN
+    ) / (rating_count + weight)
+
+
+class TitleQuerySet(models.QuerySet):
+    def add_scores(self, score, delta, pub_date=None):
+        """
+        Добавляет (delta > 0) или убирает (delta < 0) оценки одним UPDATE:
+        сдвигает сумму и количество оценок, рейтинги, столбец гистограммы,
+        дату последнего отзыва и trending_score. Без pub_date убранные
+        оценки пересчитывают trending_score по отзывам произведения.
+        """
+        new_sum = models.F("rating_sum") + score * delta
+        new_count = models.F("rating_count") + delta
+        if pub_date is not None:
+            # Загрузка из файлов сохраняет отзывы с датой-строкой.
+            pub_date = Review._meta.get_field("pub_date").to_python(pub_date)
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        if delta > 0:
+            last_review_date = Greatest(
+                Coalesce("last_review_date", models.Value(pub_date)),
+                models.Value(pub_date),
+            )
+            # ln(e^a + e^x) без переполнения: max(a, x) + ln(1 + e^-|a-x|).
+            position = models.Value(trending_position(pub_date))
+            trending_score = models.Case(
+                models.When(trending_score=None, then=position),
+                default=Greatest("trending_score", position)
+                + Ln(
+                    1
+                    + Exp(
+                        Greatest(
+                            -Abs(models.F("trending_score") - position),
+                            MIN_EXPONENT,
+                        )
+                    )
+                ),
+                output_field=models.FloatField(),
+            )
+        else:
+            # Удалённый отзыв мог быть последним: дата берётся по индексу
+            # (title, -pub_date).
+            last_review_date = models.Subquery(
+                Review.objects.filter(title=models.OuterRef("pk"))
+                .order_by("-pub_date")
+                .values("pub_date")[:1]
+            )
+            if delta == -1 and pub_date is not None:
+                trending_score = self._trending_without(pub_date)
+            else:
+                trending_score = self._trending_scores()
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=models.Case(
+                models.When(rating_count=-delta, then=models.Value(None)),
+                default=Cast(new_sum, models.FloatField()) / new_count,
+                output_field=models.FloatField(),
+            ),
+            weighted_rating=models.Case(
+                models.When(rating_count=-delta, then=models.Value(None)),
+                default=weighted_rating(new_sum, new_count),
+                output_field=models.FloatField(),
+            ),
+            last_review_date=last_review_date,
+            trending_score=trending_score,
+            **{f"score_{score}": models.F(f"score_{score}") + delta},
+        )
+
+    def recalculate_ratings(self):
+        """Пересчитывает рейтинг и статистику отзывов с нуля."""
+        reviews = (
+            Review.objects.filter(title=models.OuterRef("pk"))
+            .order_by()
+            .values("title")
+        )
+
+        def total(aggregate, **filters):
+            return Coalesce(
+                models.Subquery(
+                    reviews.filter(**filters)
+                    .annotate(total=aggregate)
+                    .values("total"),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            )
+
+        self.update(
+            rating_sum=total(models.Sum("score")),
+            rating_count=total(models.Count("id")),
+            last_review_date=models.Subquery(
+                reviews.annotate(last=models.Max("pub_date")).values("last"),
+                output_field=models.DateTimeField(),
+            ),
+            trending_score=self._trending_scores(),
+            **{
+                f"score_{score}": total(models.Count("id"), score=score)
+                for score in SCORES
+            },
+        )
+        return self.update(
+            rating=models.Case(
+                models.When(rating_count=0, then=models.Value(None)),
+                default=Cast("rating_sum", models.FloatField())
+                / models.F("rating_count"),
+                output_field=models.FloatField(),
+            ),
+            weighted_rating=models.Case(
+                models.When(rating_count=0, then=models.Value(None)),
+                default=weighted_rating(
+                    models.F("rating_sum"), models.F("rating_count")
+                ),
+                output_field=models.FloatField(),
+            ),
+        )
+
+    @classmethod
+    def _trending_without(cls, pub_date):
+        """
+        trending_score без одного отзыва: ln(e^a - e^x) = a + ln(1 - e^(x-a)).
+        Если отзыв давал почти весь счёт, разность теряет точность, и
+        счёт пересчитывается по отзывам произведения.
+        """
+        position = trending_position(pub_date)
+        return models.Case(
+            models.When(rating_count=1, then=models.Value(None)),
+            models.When(
+                trending_score__lt=position + TRENDING_PRECISION,
+                then=cls._trending_scores(),
+            ),
+            default=models.F("trending_score")
+            + Ln(
+                1
+                - Exp(
+                    Greatest(
+                        models.Value(position) - models.F("trending_score"),
+                        MIN_EXPONENT,
+                    )
+                )
+            ),
+            output_field=models.FloatField(),
+        )
+
+    @staticmethod
+    def _trending_scores():
+        """
+        trending_score по всем отзывам произведения: ln суммы e^x по
+        позициям отзывов. Позиции отсчитываются от текущего момента,
+        чтобы exp() не переполнялся.
+        """
+        now = trending_position(timezone.now())
+        position = (
+            Epoch("pub_date") - TRENDING_EPOCH.timestamp()
+        ) / trending_scale()
+        return models.Subquery(
+            Review.objects.filter(title=models.OuterRef("pk"))
+            .order_by()
+            .values("title")
+            .annotate(
+                total=Ln(
+                    models.Sum(Exp(Greatest(position - now, MIN_EXPONENT)))
+                )
+                + now
+            )
+            .values("total"),
+            output_field=models.FloatField(),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(verbose_name="название", max_length=256)
     year = models.IntegerField(verbose_name="год", validators=[year_validator])
@@ -48,9 +269,88 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name="сумма оценок", default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name="количество оценок", default=0, editable=False
+    )
+    rating = models.FloatField(
+        verbose_name="рейтинг", null=True, editable=False
+    )
+    # Гистограмма оценок: число отзывов с оценкой 1, 2, ..., 10.
+    score_1 = models.PositiveIntegerField(
+        verbose_name="число оценок 1", default=0, editable=False
+    )
+    score_2 = models.PositiveIntegerField(
+        verbose_name="число оценок 2", default=0, editable=False
+    )
+    score_3 = models.PositiveIntegerField(
+        verbose_name="число оценок 3", default=0, editable=False
+    )
+    score_4 = models.PositiveIntegerField(
+        verbose_name="число оценок 4", default=0, editable=False
+    )
+    score_5 = models.PositiveIntegerField(
+        verbose_name="число оценок 5", default=0, editable=False
+    )
+    score_6 = models.PositiveIntegerField(
+        verbose_name="число оценок 6", default=0, editable=False
+    )
+    score_7 = models.PositiveIntegerField(
+        verbose_name="число оценок 7", default=0, editable=False
+    )
+    score_8 = models.PositiveIntegerField(
+        verbose_name="число оценок 8", default=0, editable=False
+    )
+    score_9 = models.PositiveIntegerField(
+        verbose_name="число оценок 9", default=0, editable=False
+    )
+    score_10 = models.PositiveIntegerField(
+        verbose_name="число оценок 10", default=0, editable=False
+    )
+    last_review_date = models.DateTimeField(
+        verbose_name="дата последнего отзыва", null=True, editable=False
+    )
+    weighted_rating = models.FloatField(
+        verbose_name="взвешенный рейтинг", null=True, editable=False
+    )
+    # ln суммы 2^(t / TRENDING_HALF_LIFE_DAYS) по датам отзывов t от
+    # TRENDING_EPOCH. Сравнивать такие суммы — то же, что сравнивать
+    # вклады отзывов, убывающие вдвое за период полураспада, поэтому
+    # порядок выдачи не требует пересчёта со временем.
+    trending_score = models.FloatField(
+        verbose_name="популярность", null=True, editable=False
+    )
+    # На PostgreSQL заполняется триггером при вставке и изменении name.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = "произведение"
+        indexes = [
+            # Фильтры TitleFilter при выдаче в порядке id.
+            models.Index(fields=["year", "id"], name="title_year_idx"),
+            models.Index(fields=["category", "id"], name="title_category_idx"),
+            # Выдачи top и trending. Произведения без оценок в них не
+            # попадают, а в убывающем индексе стояли бы первыми.
+            models.Index(
+                fields=["-weighted_rating", "id"],
+                name="title_top_idx",
+                condition=models.Q(weighted_rating__isnull=False),
+            ),
+            models.Index(
+                fields=["category", "-weighted_rating", "id"],
+                name="title_category_top_idx",
+                condition=models.Q(weighted_rating__isnull=False),
+            ),
+            models.Index(
+                fields=["-trending_score", "id"],
+                name="title_trending_idx",
+                condition=models.Q(trending_score__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -81,12 +381,44 @@ class Review(models.Model):
     class Meta:
         verbose_name = "Отзыв"
         ordering = ("-pub_date", "score")
+        indexes = [
+            # Список отзывов произведения в порядке по умолчанию.
+            models.Index(
+                fields=["title", "-pub_date", "score"],
+                name="review_title_pub_date_idx",
+            ),
+            # Постраничный вывод по ключу (pub_date, id).
+            models.Index(
+                fields=["title", "-pub_date", "-id"],
+                name="review_title_pub_id_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["title", "author"], name="unique review"
             )
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        review.remember_score()
+        return review
+
+    def remember_score(self):
+        """
+        Запоминает произведение, оценку и дату, учтённые в рейтинге: по
+        ним post_save убирает старую оценку при изменении отзыва.
+        """
+        fields = ("title_id", "score", "pub_date")
+        values = tuple(self.__dict__.get(field) for field in fields)
+        self._rated = None if None in values else values
+
+    @transaction.atomic(savepoint=False)
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в post_save той же транзакции.
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -108,3 +440,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name = ("комментарий",)
         ordering = ("-pub_date",)
+        indexes = [
+            # Подходит и для порядка по умолчанию, и для вывода по ключу.
+            models.Index(
+                fields=["review", "-pub_date", "-id"],
+                name="comment_review_pub_id_idx",
+            ),
+        ]
@@ -0,0 +1,91 @@
+import threading
+from collections import Counter, defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from reviews.models import Review, Title, User
+
+# Строки модели sender записаны в обход сигналов моделей: bulk_create,
+# bulk_update или update(). Шлют команды загрузки и пересчёта.
+bulk_changed = Signal()
+
+
+class CascadeState(threading.local):
+    """
+    Каскадные удаления, идущие в текущем потоке.
+
+    Collector шлёт pre_delete всем объектам до удаления, а post_delete
+    отзывов — раньше, чем post_delete произведения или автора, от
+    которых идёт каскад.
+    """
+
+    def __init__(self):
+        self.titles = set()
+        self.authors = set()
+        self.removed = defaultdict(Counter)
+
+
+cascade = CascadeState()
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating_on_save(sender, instance, created, **kwargs):
+    rated = getattr(instance, "_rated", None)
+    instance.remember_score()
+    titles = Title.objects.filter(pk=instance.title_id)
+    if not created:
+        if rated == instance._rated:
+            # Изменился только текст.
+            return
+        if rated is None:
+            # Объект собран не из базы: учтённая оценка неизвестна.
+            titles.recalculate_ratings()
+            return
+        title_id, score, pub_date = rated
+        Title.objects.filter(pk=title_id).add_scores(score, -1, pub_date)
+    titles.add_scores(instance.score, 1, instance.pub_date)
+
+
+@receiver(post_delete, sender=Review)
+def update_title_rating_on_delete(sender, instance, **kwargs):
+    if instance.title_id in cascade.titles:
+        # Произведение удаляется следом, его рейтинг не нужен.
+        return
+    if instance.author_id in cascade.authors:
+        cascade.removed[instance.title_id][instance.score] += 1
+        return
+    Title.objects.filter(pk=instance.title_id).add_scores(
+        instance.score, -1, instance.pub_date
+    )
+
+
+@receiver(pre_delete, sender=Title)
+def start_title_cascade(sender, instance, **kwargs):
+    cascade.titles.add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def finish_title_cascade(sender, instance, **kwargs):
+    cascade.titles.discard(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def start_author_cascade(sender, instance, **kwargs):
+    cascade.authors.add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def finish_author_cascade(sender, instance, **kwargs):
+    """
+    Убирает оценки удалённых отзывов автора: произведения с одинаковой
+    убранной оценкой обновляются одним UPDATE.
+    """
+    cascade.authors.discard(instance.pk)
+    groups = defaultdict(list)
+    for title_id, scores in cascade.removed.items():
+        for score, count in scores.items():
+            groups[score, count].append(title_id)
+    cascade.removed.clear()
+    for (score, count), title_ids in groups.items():
+        Title.objects.filter(pk__in=title_ids).add_scores(score, -count)
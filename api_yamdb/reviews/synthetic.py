@@ -0,0 +1,112 @@
+"""Синтетический каталог для тестов и замеров производительности."""
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import bulk_changed
+from users.models import User
+
+
+def generate_dataset(
+    titles=1000,
+    users=200,
+    reviews_per_title=3,
+    comments_per_review=2,
+    genres=20,
+    categories=5,
+    genres_per_title=2,
+    batch_size=5000,
+    seed=0,
+):
+    """
+    Наполняет базу через bulk_create и пересчитывает рейтинги.
+
+    Возвращает словарь с количеством созданных объектов по моделям.
+    """
+    rnd = random.Random(seed)
+    now = timezone.now()
+
+    category_objs = Category.objects.bulk_create(
+        Category(name=f"Категория {i}", slug=f"category-{i}")
+        for i in range(categories)
+    )
+    genre_objs = Genre.objects.bulk_create(
+        Genre(name=f"Жанр {i}", slug=f"genre-{i}") for i in range(genres)
+    )
+    user_objs = User.objects.bulk_create(
+        (
+            User(username=f"user{i}", email=f"user{i}@yamdb.fake")
+            for i in range(users)
+        ),
+        batch_size=batch_size,
+    )
+    title_objs = Title.objects.bulk_create(
+        (
+            Title(
+                name=f"Произведение {i}",
+                year=rnd.randint(1900, now.year),
+                category=rnd.choice(category_objs),
+            )
+            for i in range(titles)
+        ),
+        batch_size=batch_size,
+    )
+    Title.genre.through.objects.bulk_create(
+        (
+            Title.genre.through(title_id=title.id, genre_id=genre.id)
+            for title in title_objs
+            for genre in rnd.sample(genre_objs, genres_per_title)
+        ),
+        batch_size=batch_size,
+    )
+    review_objs = Review.objects.bulk_create(
+        (
+            Review(
+                title=title,
+                author=author,
+                text=f"Отзыв на {title.name}",
+                score=rnd.randint(1, 10),
+                pub_date=now - timedelta(minutes=rnd.randint(0, 525600)),
+            )
+            for title in title_objs
+            for author in rnd.sample(user_objs, reviews_per_title)
+        ),
+        batch_size=batch_size,
+    )
+    comment_count = len(
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    review=review,
+                    author=rnd.choice(user_objs),
+                    text="Комментарий",
+                    pub_date=review.pub_date + timedelta(minutes=i + 1),
+                )
+                for review in review_objs
+                for i in range(comments_per_review)
+            ),
+            batch_size=batch_size,
+        )
+    )
+    Title.objects.recalculate_ratings()
+    for model in (
+        Category,
+        Genre,
+        User,
+        Title,
+        Title.genre.through,
+        Review,
+        Comment,
+    ):
+        bulk_changed.send(sender=model)
+
+    return {
+        "categories": len(category_objs),
+        "genres": len(genre_objs),
+        "users": len(user_objs),
+        "titles": len(title_objs),
+        "reviews": len(review_objs),
+        "comments": comment_count,
+    }
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from users.models import User
+from users.models import OutboxEmail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -15,4 +15,11 @@ class UserAdmin(admin.ModelAdmin):
     )
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "to", "subject", "created", "attempts", "sent_at")
+    list_filter = ("sent_at",)
+    search_fields = ("to",)
+
+
 admin.site.register(User, UserAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = "Delivers queued emails from the outbox"
+    delivery_fields = ("sent_at", "attempts", "send_after", "last_error")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Attempts before a message is given up on",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=30,
+            help="Delay in seconds before the first retry, doubled after "
+            "every failure",
+        )
+        parser.add_argument(
+            "--claim-timeout",
+            type=float,
+            default=300,
+            help="Seconds a claimed batch stays hidden from other workers",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep when the outbox is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no pending messages are left",
+        )
+
+    def handle(self, *args, **options):
+        # Одно соединение с почтовым сервером на всё время работы.
+        connection = get_connection()
+        try:
+            while True:
+                processed = self._send_batch(connection, options)
+                if processed:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+    def _send_batch(self, connection, options):
+        batch = self._claim(options)
+        for email in batch:
+            # Каждое письмо фиксируется сразу после отправки: сбой на
+            # середине пачки не приведёт к повторной отправке уже ушедших.
+            self._send(connection, email, options)
+            email.save(update_fields=self.delivery_fields)
+
+        sent = sum(email.sent_at is not None for email in batch)
+        if batch:
+            self.stdout.write(f"Sent {sent}, failed {len(batch) - sent}.")
+        return len(batch)
+
+    def _claim(self, options):
+        # skip_locked позволяет запускать несколько воркеров: каждый
+        # забирает свою пачку, не дожидаясь остальных. Блокировка держится
+        # только на время выборки, а от других воркеров пачку на время
+        # отправки скрывает сдвинутый send_after.
+        with transaction.atomic():
+            batch = list(
+                OutboxEmail.objects.pending(options["max_attempts"])
+                .select_for_update(skip_locked=True)
+                .order_by("send_after", "id")[: options["batch_size"]]
+            )
+            claimed_until = timezone.now() + timedelta(
+                seconds=options["claim_timeout"]
+            )
+            OutboxEmail.objects.filter(
+                id__in=[email.id for email in batch]
+            ).update(send_after=claimed_until)
+        return batch
+
+    def _send(self, connection, email, options):
+        try:
+            connection.open()
+            connection.send_messages([email.as_message(connection)])
+        except Exception as error:
+            # Ошибка одного письма не прерывает пачку. Сломанное
+            # соединение переоткрывается при следующей отправке.
+            connection.close()
+            email.attempts += 1
+            email.last_error = str(error) or repr(error)
+            delay = options["backoff"] * 2 ** (email.attempts - 1)
+            email.send_after = timezone.now() + timedelta(seconds=delay)
+            if email.attempts >= options["max_attempts"]:
+                self.stderr.write(
+                    f"Giving up on email {email.id} to {email.to}: {error}"
+                )
+        else:
+            email.attempts += 1
+            email.sent_at = timezone.now()
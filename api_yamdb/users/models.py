@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils import timezone
 from model_utils import Choices
 from model_utils.fields import StatusField
 
@@ -15,6 +17,13 @@ class User(AbstractUser):
     bio = models.TextField(max_length=500, blank=True)
     confirmation_code = models.CharField(max_length=10, blank=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Имя на момент чтения: по нему видно, что сохранение сменило имя.
+        user._loaded_username = user.__dict__.get("username")
+        return user
+
     def set_confirmation_code(self, data):
         """Устанавливает код_подтверждения у юзера."""
         self.confirmation_code = data
@@ -22,8 +31,8 @@ class User(AbstractUser):
 
     def remove_confirmation_code(self):
         """Удаляет код_подтверждения у юзера."""
-        self.confirmation_code = 0
-        self.save()
+        self.confirmation_code = ""
+        self.save(update_fields=["confirmation_code"])
 
     @property
     def is_admin(self):
@@ -32,3 +41,70 @@ class User(AbstractUser):
     @property
     def is_moderator_or_admin(self):
         return self.role == self.MODERATOR or self.is_admin
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    def pending(self, max_attempts):
+        """Неотправленные письма, срок очередной попытки которых настал."""
+        return self.filter(
+            sent_at__isnull=True,
+            attempts__lt=max_attempts,
+            send_after__lte=timezone.now(),
+        )
+
+
+class OutboxEmail(models.Model):
+    """
+    Исходящее письмо.
+
+    Запись создаётся в той же транзакции, что и изменение, ради которого
+    письмо отправляется, а доставляет его команда send_outbox.
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.EmailField()
+    created = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["send_after"],
+                name="outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True),
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to}"
+
+    def as_message(self, connection):
+        return EmailMessage(
+            self.subject,
+            self.body,
+            self.from_email,
+            [self.to],
+            connection=connection,
+        )
+
+
+class TokenUser(User):
+    """
+    Пользователь, собранный из утверждений токена без запроса к базе.
+
+    Заполнены только id и поля, нужные для проверки прав, поэтому
+    сохранять такой объект нельзя.
+    """
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise TypeError("TokenUser is built from a token and cannot be saved")
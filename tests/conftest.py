@@ -1,9 +1,46 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='TestUser', email='testuser@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+@pytest.fixture(autouse=True)
+def reset_slug_caches():
+    # Без transaction=True версии справочников не сдвигаются: on_commit
+    # не срабатывает, а id в базе после отката переиспользуются.
+    from api.slugs import SLUG_CACHES
+
+    for slug_cache in SLUG_CACHES.values():
+        slug_cache.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    # Вёдра живут в памяти процесса и иначе копились бы между тестами.
+    from api.throttling import reset_stores
+
+    reset_stores()
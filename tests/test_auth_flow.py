@@ -0,0 +1,92 @@
+import pytest
+from rest_framework.test import APIClient
+
+from users.models import OutboxEmail, User
+
+pytestmark = pytest.mark.django_db
+
+
+def signup(**data):
+    return APIClient().post('/api/v1/auth/signup/', data=data)
+
+
+def get_token(username, code):
+    return APIClient().post('/api/v1/auth/token/', data={
+        'username': username, 'confirmation_code': code,
+    })
+
+
+@pytest.fixture
+def newbie():
+    response = signup(username='newbie', email='newbie@yamdb.fake')
+    assert response.status_code == 200, response.content
+    return User.objects.get(username='newbie')
+
+
+class TestSignUp:
+
+    def test_signup(self, newbie):
+        assert newbie.email == 'newbie@yamdb.fake'
+        assert len(newbie.confirmation_code) == 10
+        assert OutboxEmail.objects.filter(to=newbie.email).exists()
+
+    def test_role_is_not_accepted(self):
+        signup(username='newbie', email='newbie@yamdb.fake', role='admin')
+        assert User.objects.get(username='newbie').role == User.USER, (
+            'Проверьте, что при регистрации нельзя выбрать роль'
+        )
+
+    @pytest.mark.parametrize('data, field', [
+        ({'username': 'newbie', 'email': 'other@yamdb.fake'}, 'username'),
+        ({'username': 'other', 'email': 'newbie@yamdb.fake'}, 'email'),
+    ])
+    def test_duplicate(self, newbie, data, field,
+                       django_assert_max_num_queries):
+        # Одна неудачная вставка; остальное — SAVEPOINT тестовой транзакции.
+        with django_assert_max_num_queries(4):
+            response = signup(**data)
+
+        assert response.status_code == 400
+        assert list(response.json()) == [field]
+        assert User.objects.count() == 1
+        assert OutboxEmail.objects.count() == 1, (
+            'Проверьте, что письмо не остаётся после неудачной регистрации'
+        )
+
+    def test_me_is_forbidden(self):
+        response = signup(username='me', email='me@yamdb.fake')
+        assert response.status_code == 400
+        assert 'username' in response.json()
+
+    def test_invalid_username(self):
+        response = signup(username='bad name/../x', email='bad@yamdb.fake')
+        assert response.status_code == 400
+        assert 'username' in response.json()
+        assert not User.objects.exists()
+
+
+class TestToken:
+
+    def test_code_is_single_use(self, newbie):
+        code = newbie.confirmation_code
+        assert get_token('newbie', code).status_code == 200
+
+        newbie.refresh_from_db()
+        assert newbie.confirmation_code == ''
+        assert get_token('newbie', code).status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать дважды'
+        )
+
+    def test_wrong_code(self, newbie):
+        response = get_token('newbie', 'wrong')
+        assert response.status_code == 400
+        newbie.refresh_from_db()
+        assert newbie.confirmation_code != ''
+
+    def test_cleared_code_is_not_accepted(self, newbie):
+        User.objects.filter(pk=newbie.pk).update(confirmation_code='')
+        for code in ('', '0'):
+            assert get_token('newbie', code).status_code == 400
+
+    def test_unknown_user(self):
+        assert get_token('nobody', 'code').status_code == 404
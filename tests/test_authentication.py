@@ -0,0 +1,101 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Title
+from users.models import User
+
+
+def issue_token(user):
+    User.objects.filter(pk=user.pk).update(confirmation_code='secret')
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username, 'confirmation_code': 'secret',
+    })
+    assert response.status_code == 200, response.content
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["token"]}')
+    return client
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+def user_queries(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+    return response, queries
+
+
+class TestStatelessAuthentication:
+
+    @pytest.mark.django_db
+    def test_request_does_not_fetch_user(self, user, title):
+        cache.clear()
+        client = issue_token(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        client.get('/api/v1/titles/')
+        response, queries = user_queries(
+            client, 'post', url, {'text': 'Отзыв', 'score': 5}
+        )
+
+        assert response.status_code == 201, response.content
+        assert response.data['author'] == user.username
+        assert queries == [], (
+            'Проверьте, что пользователь из токена не читается из базы'
+        )
+
+    @pytest.mark.django_db
+    def test_me_reads_full_profile(self, user):
+        user.bio = 'Биография'
+        user.save()
+        client = issue_token(user)
+
+        response = client.get('/api/v1/users/me/')
+
+        assert response.status_code == 200
+        assert response.data['email'] == user.email
+        assert response.data['bio'] == 'Биография'
+
+    @pytest.mark.django_db
+    def test_token_without_claims_falls_back_to_database(self, user_client):
+        response, queries = user_queries(
+            user_client, 'get', '/api/v1/users/me/'
+        )
+
+        assert response.status_code == 200
+        assert len(queries) == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_role_change_revokes_token(self, user):
+        cache.clear()
+        client = issue_token(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+        user.role = User.ADMIN
+        user.save()
+
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены'
+        )
+        assert issue_token(user).get('/api/v1/users/').status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_blocked_user_is_rejected(self, user):
+        cache.clear()
+        client = issue_token(user)
+
+        user.is_active = False
+        user.save()
+
+        assert client.get('/api/v1/users/me/').status_code == 401
@@ -0,0 +1,142 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.bulk import BulkWriteMixin
+from reviews.models import Category, Genre, Title
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def catalogue():
+    Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.bulk_create([
+        Genre(name='Драма', slug='drama'),
+        Genre(name='Комедия', slug='comedy'),
+    ])
+
+
+def title_items(count):
+    return [
+        {'name': f'Фильм {i}', 'year': 2000, 'category': 'movie',
+         'genre': ['drama', 'comedy']}
+        for i in range(count)
+    ]
+
+
+class TestBulkApi:
+
+    def test_bulk_create_categories(self, admin_client, catalogue):
+        response = admin_client.post('/api/v1/categories/bulk/', [
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Снова фильм', 'slug': 'movie'},
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Без слага'},
+        ], format='json')
+
+        assert response.status_code == 200, response.content
+        statuses = [item['status'] for item in response.data['results']]
+        assert statuses == ['created', 'error', 'error', 'error'], (
+            'Проверьте, что повторы и неверные элементы отклоняются '
+            'по отдельности'
+        )
+        assert Category.objects.filter(slug='book').count() == 1
+
+    def test_bulk_create_titles(self, admin_client, catalogue):
+        items = title_items(3) + [
+            {'name': 'Фильм', 'year': 2000, 'category': 'movie',
+             'genre': ['unknown']},
+        ]
+        response = admin_client.post(
+            '/api/v1/titles/bulk/', items, format='json'
+        )
+
+        assert response.status_code == 200, response.content
+        results = response.data['results']
+        assert [item['status'] for item in results] == [
+            'created', 'created', 'created', 'error'
+        ]
+        assert 'genre' in results[3]['errors']
+        title = Title.objects.get(id=results[0]['id'])
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_write_invalidates_cache(self, admin_client, catalogue):
+        cache.clear()
+        assert admin_client.get('/api/v1/titles/').data['count'] == 0
+
+        admin_client.post('/api/v1/titles/bulk/', title_items(3),
+                          format='json')
+
+        assert admin_client.get('/api/v1/titles/').data['count'] == 3, (
+            'Проверьте, что пакетная запись сбрасывает кэш каталога'
+        )
+
+    def test_bulk_create_query_count_is_constant(
+            self, admin_client, catalogue, django_assert_max_num_queries):
+        for count in (10, 200):
+            with django_assert_max_num_queries(9):
+                response = admin_client.post(
+                    '/api/v1/titles/bulk/', title_items(count), format='json'
+                )
+            assert response.status_code == 200
+
+    def test_bulk_update_titles(self, admin_client, catalogue):
+        created = admin_client.post(
+            '/api/v1/titles/bulk/', title_items(2), format='json'
+        ).data['results']
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': created[0]['id'], 'name': 'Новое имя', 'genre': ['drama']},
+            {'id': created[1]['id'], 'year': 1999},
+            {'id': 0, 'year': 1999},
+            {'name': 'Без id'},
+        ], format='json')
+
+        assert response.status_code == 200, response.content
+        assert [item['status'] for item in response.data['results']] == [
+            'updated', 'updated', 'error', 'error'
+        ]
+        first = Title.objects.get(id=created[0]['id'])
+        assert first.name == 'Новое имя'
+        assert list(first.genre.values_list('slug', flat=True)) == ['drama']
+        second = Title.objects.get(id=created[1]['id'])
+        assert second.year == 1999
+        assert second.genre.count() == 2
+
+    def test_genres_cannot_be_updated(self, admin_client, catalogue):
+        response = admin_client.patch(
+            '/api/v1/genres/bulk/', [{'slug': 'drama'}], format='json'
+        )
+        assert response.status_code == 405
+
+    def test_bulk_requires_admin(self, user_client, catalogue):
+        response = user_client.post(
+            '/api/v1/titles/bulk/', title_items(1), format='json'
+        )
+        assert response.status_code == 403
+        assert not Title.objects.exists()
+
+
+def test_hooks_are_checked_at_class_definition():
+    with pytest.raises(TypeError, match='bulk_update_items'):
+        class CreateOnly(BulkWriteMixin):
+            def bulk_create_items(self, items, results):
+                pass
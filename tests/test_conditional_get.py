@@ -0,0 +1,163 @@
+import io
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.cache import bump_version_on_commit, get_version
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+# Версии пространств имён сдвигаются после коммита.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def review(user):
+    cache.clear()
+    title = Title.objects.create(name='Произведение', year=2000)
+    return Review.objects.create(
+        title=title, author=user, text='Отзыв', score=5
+    )
+
+
+def comments_url(review):
+    return f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+
+
+class TestConditionalGet:
+
+    def test_matching_etag_returns_304(self, review):
+        client = APIClient()
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_write_changes_etag(self, review, user_client):
+        client = APIClient()
+        url = comments_url(review)
+        etag = client.get(url)['ETag']
+
+        response = user_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что запись меняет ETag списка'
+        )
+        assert response['ETag'] != etag
+        assert len(response.json()['results']) == 1
+
+    def test_unsafe_method_never_returns_304(self, review, user_client):
+        url = comments_url(review)
+        etag = user_client.get(url)['ETag']
+
+        response = user_client.post(
+            url, {'text': 'Комментарий'}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 201
+
+    def test_review_delete_cost_does_not_depend_on_comments(self, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        authors = User.objects.bulk_create(
+            User(username=f'author{i}', email=f'author{i}@yamdb.fake')
+            for i in range(2)
+        )
+        counts = []
+        for author, comments in zip(authors, (1, 10)):
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            Comment.objects.bulk_create(
+                Comment(review=review, author=user, text='Комментарий')
+                for _ in range(comments)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                review.delete()
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1], (
+            'Проверьте, что удаление комментариев не читает их отзыв '
+            f'по одному: {counts}'
+        )
+
+    def test_author_rename_changes_etag(self, review, user_client):
+        client = APIClient()
+        urls = (f'/api/v1/titles/{review.title_id}/reviews/',
+                comments_url(review))
+        Comment.objects.create(review=review, author=review.author,
+                               text='Комментарий')
+        etags = [client.get(url)['ETag'] for url in urls]
+
+        response = user_client.patch(
+            '/api/v1/users/me/', {'username': 'bob'}, format='json'
+        )
+        assert response.status_code == 200
+
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что смена имени автора меняет ETag {url}'
+            )
+            assert response.json()['results'][0]['author'] == 'bob'
+
+    def test_versions_are_shared_between_processes(self, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        etag = APIClient().get(url)['ETag']
+
+        # Кэш другого воркера пуст, но версии в нём не хранятся.
+        cache.clear()
+        response = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_load_in_worker_processes_changes_etag(self, tmp_path):
+        cache.clear()
+        client = APIClient()
+        etag = client.get('/api/v1/genres/')['ETag']
+        (tmp_path / 'category.csv').write_text('id,name,slug\n')
+        (tmp_path / 'genre.csv').write_text('id,name,slug\n1,Драма,drama\n')
+
+        # Обе сущности грузятся в дочерних процессах.
+        call_command(
+            'load_entity', 'category', 'genre', bulk=True, jobs=2,
+            source=str(tmp_path), stdout=io.StringIO(),
+        )
+
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что загрузка из другого процесса меняет ETag'
+        )
+        assert response.json()['results'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+
+    def test_rebuild_ratings_changes_etag(self, review):
+        client = APIClient()
+        url = f'/api/v1/titles/{review.title_id}/'
+        etag = client.get(url)['ETag']
+        Title.objects.update(rating=None)
+
+        call_command('rebuild_ratings', stdout=io.StringIO())
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['rating'] == 5
+
+    def test_rolled_back_bump_is_dropped(self):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                bump_version_on_commit('test')
+                raise RuntimeError
+        assert get_version('test') == 0
+
+        with transaction.atomic():
+            bump_version_on_commit('test')
+            bump_version_on_commit('test')
+        assert get_version('test') > 0
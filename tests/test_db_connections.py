@@ -0,0 +1,60 @@
+import pytest
+from django.core.signals import request_started
+from django.db import connection
+
+from api.metrics import registry
+
+CREATED = 'db_connections_created:default'
+DISCARDED = 'db_connections_discarded:default'
+
+
+def counter(name):
+    return registry.snapshot()['counters'].get(name, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDbConnections:
+
+    def test_settings(self, settings):
+        database = settings.DATABASES['default']
+        assert database['ENGINE'] == 'django.db.backends.postgresql'
+        assert database['CONN_MAX_AGE'] != 0, (
+            'Проверьте, что соединения с базой по умолчанию постоянные'
+        )
+        assert database['CONN_HEALTH_CHECKS']
+
+    def test_connection_setup_is_counted(self):
+        connection.ensure_connection()
+        before = counter(CREATED)
+        connection.close()
+        connection.ensure_connection()
+        assert counter(CREATED) == before + 1
+
+    def test_reused_connection_is_not_counted(self, client):
+        client.get('/api/v1/categories/')
+        before = counter(CREATED)
+        client.get('/api/v1/categories/')
+        assert counter(CREATED) == before, (
+            'Проверьте, что живое соединение используется повторно'
+        )
+
+    def test_broken_connection_is_discarded(self, monkeypatch):
+        connection.ensure_connection()
+        before = counter(DISCARDED)
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+
+        request_started.send(sender=None)
+
+        assert connection.connection is None
+        assert counter(DISCARDED) == before + 1
+
+    def test_health_checks_can_be_disabled(self, monkeypatch):
+        connection.ensure_connection()
+        monkeypatch.setitem(
+            connection.settings_dict, 'CONN_HEALTH_CHECKS', False
+        )
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+
+        request_started.send(sender=None)
+
+        assert connection.connection is not None
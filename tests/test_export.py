@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import SCORE_FIELDS, Category, Genre, Review, Title
+from reviews.synthetic import generate_dataset
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def catalogue():
+    generate_dataset(titles=20, users=10, reviews_per_title=3,
+                     comments_per_review=0)
+    Title.objects.create(name='Без категории', year=2000)
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+def export(**options):
+    out = io.StringIO()
+    call_command('export_catalogue', stdout=out, **options)
+    return out.getvalue()
+
+
+def clear_catalogue():
+    Review.objects.all().delete()
+    Title.objects.all().delete()
+    Genre.objects.all().delete()
+    Category.objects.all().delete()
+
+
+class TestExport:
+
+    def test_export_requires_admin(self, user_client, catalogue):
+        assert user_client.get('/api/v1/export/').status_code == 403
+
+    def test_ndjson_stream(self, admin_client, catalogue):
+        response = admin_client.get('/api/v1/export/?reviews=1')
+
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоком'
+        )
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        entities = [row['entity'] for row in rows]
+        assert entities == sorted(entities, key=[
+            'category', 'genre', 'titles', 'genre_title', 'review'
+        ].index), 'Проверьте, что сущности идут в порядке зависимостей'
+        titles = [row for row in rows if row['entity'] == 'titles']
+        assert len(titles) == Title.objects.count()
+        assert all('rating' not in row for row in titles), (
+            'Проверьте, что производный рейтинг не выгружается'
+        )
+        assert entities.count('review') == Review.objects.count()
+
+    def test_csv_stream(self, admin_client, catalogue):
+        response = admin_client.get('/api/v1/export/?output=csv&entity=titles')
+
+        assert response.status_code == 200
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert list(rows[0]) == [
+            'id', 'name', 'year', 'description', 'category'
+        ]
+        assert len(rows) == Title.objects.count()
+
+    def test_csv_needs_entity(self, admin_client, catalogue):
+        response = admin_client.get('/api/v1/export/?output=csv')
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('bulk', [False, True])
+    def test_ndjson_round_trip(self, catalogue, tmp_path, bulk):
+        path = tmp_path / 'catalogue.ndjson'
+        call_command('export_catalogue', reviews=True, output=str(path))
+        exported = path.read_text()
+        clear_catalogue()
+
+        call_command(
+            'load_entity', 'category', 'genre', 'titles', 'genre_title',
+            'review', source=str(path), bulk=bulk, stdout=io.StringIO(),
+        )
+
+        assert export(reviews=True) == exported, (
+            'Проверьте, что выгрузка загружается обратно без потерь'
+        )
+
+    def test_csv_round_trip(self, catalogue, tmp_path):
+        call_command('export_catalogue', format='csv', reviews=True,
+                     output=str(tmp_path), stderr=io.StringIO())
+        exported = export(reviews=True)
+        clear_catalogue()
+
+        call_command(
+            'load_entity', 'category', 'genre', 'titles', 'genre_title',
+            'review', source=str(tmp_path), bulk=True, stdout=io.StringIO(),
+        )
+
+        assert export(reviews=True) == exported
+
+    @pytest.mark.parametrize('bulk', [False, True])
+    def test_round_trip_restores_rating_stats(self, catalogue, tmp_path,
+                                              bulk):
+        fields = (
+            'id', 'rating', 'rating_sum', 'rating_count', 'weighted_rating',
+            'last_review_date', *SCORE_FIELDS,
+        )
+        stats = Title.objects.order_by('id').values_list(*fields)
+        expected = list(stats)
+        path = tmp_path / 'catalogue.ndjson'
+        call_command('export_catalogue', reviews=True, output=str(path))
+        clear_catalogue()
+
+        call_command(
+            'load_entity', 'category', 'genre', 'titles', 'genre_title',
+            'review', source=str(path), bulk=bulk, stdout=io.StringIO(),
+        )
+
+        assert list(stats.all()) == expected, (
+            'Проверьте, что статистика отзывов согласована после загрузки'
+        )
+
+    def test_exported_rating_is_ignored(self, tmp_path):
+        path = tmp_path / 'catalogue.ndjson'
+        path.write_text(json.dumps({
+            'entity': 'titles', 'id': 1, 'name': 'Фильм', 'year': 2000,
+            'description': '', 'category': None, 'rating': 10,
+        }))
+
+        call_command('load_entity', 'titles', source=str(path),
+                     stdout=io.StringIO())
+
+        title = Title.objects.get()
+        assert (title.rating, title.rating_count) == (None, 0)
@@ -0,0 +1,88 @@
+import pytest
+from django.core.cache import cache
+
+from reviews.models import Title
+from reviews.synthetic import generate_dataset
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def urls():
+    generate_dataset(titles=30, users=20, reviews_per_title=8,
+                     comments_per_review=7, genres_per_title=3)
+    bare = Title.objects.create(name='Без категории', year=2000)
+    title = Title.objects.exclude(pk=bare.pk).order_by('id').first()
+    review = title.reviews.order_by('id').first()
+    comment = review.comments.order_by('id').first()
+    base = f'/api/v1/titles/{title.id}/reviews'
+    return [
+        '/api/v1/titles/',
+        '/api/v1/titles/?page=3',
+        '/api/v1/titles/?genre=genre-1',
+        '/api/v1/titles/?search=Произведение 1',
+        f'/api/v1/titles/{title.id}/',
+        f'/api/v1/titles/{bare.id}/',
+        '/api/v1/titles/0/',
+        f'{base}/',
+        f'{base}/?page=2',
+        f'{base}/?pagination=cursor',
+        f'{base}/{review.id}/',
+        f'{base}/{review.id}/comments/',
+        f'{base}/{review.id}/comments/?pagination=cursor',
+        f'{base}/{review.id}/comments/{comment.id}/',
+        '/api/v1/titles/?expand=stats',
+        f'/api/v1/titles/{title.id}/?expand=stats',
+        f'/api/v1/titles/{bare.id}/?expand=stats',
+        '/api/v1/titles/top/?page=2',
+        '/api/v1/titles/top/?genre=genre-1',
+        '/api/v1/titles/trending/',
+    ]
+
+
+def get(client, url):
+    # Кэш ответов вернул бы тело, собранное другим способом.
+    cache.clear()
+    response = client.get(url)
+    return response.status_code, response.content
+
+
+class TestFastSerializers:
+
+    def test_output_matches_serializers(self, client, settings, urls):
+        for url in urls:
+            settings.FAST_SERIALIZERS = False
+            expected = get(client, url)
+            settings.FAST_SERIALIZERS = True
+            actual = get(client, url)
+            assert actual == expected, (
+                f'Проверьте, что быстрый вывод {url} совпадает с выводом '
+                f'сериализатора'
+            )
+
+    def test_cursor_pages_match(self, client, settings, urls):
+        url = urls[9]
+        pages = {}
+        for fast in (False, True):
+            settings.FAST_SERIALIZERS = fast
+            next_url, pages[fast] = url, []
+            while next_url:
+                cache.clear()
+                data = client.get(next_url).json()
+                pages[fast].append(data['results'])
+                next_url = data['next']
+        assert pages[True] == pages[False]
+        assert len(pages[True]) == 2
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/abc/',
+        '/api/v1/titles/1/reviews/abc/',
+        '/api/v1/titles/1/reviews/1/comments/abc/',
+    ])
+    def test_malformed_id_is_not_found(self, client, settings, url):
+        for fast in (False, True):
+            settings.FAST_SERIALIZERS = fast
+            cache.clear()
+            assert client.get(url).status_code == 404, (
+                f'Проверьте, что {url} отвечает 404, а не 500'
+            )
@@ -0,0 +1,133 @@
+import io
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from reviews.management.commands.load_entity import DATA_DIR, Command
+from reviews.models import (
+    SCORE_FIELDS,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title,
+)
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+ENTITIES = (
+    'category', 'genre', 'titles', 'genre_title', 'users', 'review',
+    'comments',
+)
+TABLES = {
+    Category: ('id', 'name', 'slug'),
+    Genre: ('id', 'name', 'slug'),
+    Title: (
+        'id', 'name', 'year', 'description', 'category_id', 'rating_sum',
+        'rating_count', 'last_review_date', *SCORE_FIELDS,
+    ),
+    Title.genre.through: ('title_id', 'genre_id'),
+    User: ('id', 'username', 'email', 'role', 'bio'),
+    Review: ('id', 'title_id', 'author_id', 'text', 'score', 'pub_date'),
+    Comment: ('id', 'review_id', 'author_id', 'text', 'pub_date'),
+}
+
+
+def load(**options):
+    """Содержимое таблиц после загрузки static/data, таблицы очищаются."""
+    call_command('load_entity', *ENTITIES, stdout=io.StringIO(), **options)
+    tables = {
+        model._meta.db_table: list(
+            model.objects.order_by(*fields).values_list(*fields)
+        )
+        for model, fields in TABLES.items()
+    }
+    Title.objects.all().delete()
+    Genre.objects.all().delete()
+    Category.objects.all().delete()
+    User.objects.all().delete()
+    return tables
+
+
+class TestLoadEntity:
+
+    def test_bulk_matches_plain_load(self):
+        plain = load()
+        assert all(plain.values()), (
+            'Проверьте, что тестовые данные заполняют все таблицы'
+        )
+
+        # Маленькие пачки проверяют и вставку, и обновление по частям.
+        assert load(bulk=True, batch_size=7) == plain, (
+            'Проверьте, что --bulk загружает те же строки и связи'
+        )
+
+    def test_bulk_load_updates_existing_rows(self):
+        plain = load()
+        call_command(
+            'load_entity', *ENTITIES, bulk=True, stdout=io.StringIO()
+        )
+        assert load(bulk=True) == plain
+
+
+class TestParallelLoad:
+
+    def test_dependencies(self):
+        assert Command()._build_dependencies(ENTITIES) == {
+            'category': set(),
+            'genre': set(),
+            'users': set(),
+            'titles': {'category'},
+            'genre_title': {'titles', 'genre'},
+            'review': {'titles', 'users'},
+            'comments': {'review', 'users'},
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_entities_wait_for_dependencies(self, tmp_path, monkeypatch):
+        log = tmp_path / 'log'
+        load_entity = Command._load_entity
+
+        def logged(self, entity_name, options):
+            # Воркеры пишут в общий файл: каждая строка — одна запись.
+            with open(log, 'a') as file:
+                file.write(f'start {entity_name}\n')
+            load_entity(self, entity_name, options)
+            with open(log, 'a') as file:
+                file.write(f'finish {entity_name}\n')
+
+        # Воркеры получают подменённый метод через fork.
+        monkeypatch.setattr(Command, '_load_entity', logged)
+        load(jobs=3)
+
+        events = log.read_text().splitlines()
+        dependencies = Command()._build_dependencies(ENTITIES)
+        for name, required in dependencies.items():
+            for dependency in required:
+                assert (
+                    events.index(f'finish {dependency}')
+                    < events.index(f'start {name}')
+                ), f'Проверьте, что {name} загружается после {dependency}'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_parallel_matches_serial(self):
+        assert load(jobs=3) == load()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_worker_error_is_raised(self, tmp_path):
+        # Файла titles.csv нет: воркер titles падает.
+        for name in ('category', 'genre', 'users'):
+            (tmp_path / f'{name}.csv').write_text(
+                (Path(DATA_DIR) / f'{name}.csv').read_text()
+            )
+
+        with pytest.raises(FileNotFoundError):
+            call_command(
+                'load_entity', *ENTITIES, jobs=3, source=str(tmp_path),
+                stdout=io.StringIO(),
+            )
+        assert not Review.objects.exists(), (
+            'Проверьте, что зависимые сущности не загружаются после ошибки'
+        )
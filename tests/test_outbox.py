@@ -0,0 +1,106 @@
+from smtplib import SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import OutboxEmail, User
+
+pytestmark = pytest.mark.django_db
+
+
+def signup(username):
+    return APIClient().post('/api/v1/auth/signup/', data={
+        'username': username, 'email': f'{username}@yamdb.fake',
+    })
+
+
+class TestOutbox:
+
+    def test_signup_enqueues_email(self):
+        response = signup('newbie')
+
+        assert response.status_code == 200, response.content
+        assert mail.outbox == [], (
+            'Проверьте, что регистрация не отправляет письмо сама'
+        )
+        email = OutboxEmail.objects.get()
+        user = User.objects.get(username='newbie')
+        assert email.to == user.email
+        assert email.body == user.confirmation_code
+
+    def test_send_outbox_delivers_batch(self):
+        for i in range(3):
+            signup(f'user{i}')
+
+        call_command('send_outbox', once=True, batch_size=2, stdout=None)
+
+        assert len(mail.outbox) == 3
+        assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_failed_delivery_is_retried_with_backoff(self, monkeypatch):
+        def fail(self, messages):
+            raise SMTPServerDisconnected('connection lost')
+
+        signup('newbie')
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        call_command('send_outbox', once=True, backoff=60)
+
+        email = OutboxEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert email.last_error == 'connection lost'
+        assert email.send_after > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+
+        monkeypatch.undo()
+        OutboxEmail.objects.update(send_after=timezone.now())
+        call_command('send_outbox', once=True)
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert len(mail.outbox) == 1
+
+    def test_failure_does_not_stop_batch(self, monkeypatch):
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_second(self, messages):
+            if messages[0].to == ['user1@yamdb.fake']:
+                raise ValueError('bad message')
+            return send_messages(self, messages)
+
+        for i in range(3):
+            signup(f'user{i}')
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail_for_second)
+        call_command('send_outbox', once=True, stdout=None)
+
+        assert len(mail.outbox) == 2
+        failed = OutboxEmail.objects.get(sent_at__isnull=True)
+        assert failed.to == 'user1@yamdb.fake'
+        assert failed.last_error == 'bad message'
+        assert failed.attempts == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_send_outside_transaction(monkeypatch):
+    send_messages = EmailBackend.send_messages
+    in_transaction = []
+
+    def record(self, messages):
+        in_transaction.append(connection.in_atomic_block)
+        return send_messages(self, messages)
+
+    for i in range(2):
+        signup(f'user{i}')
+    monkeypatch.setattr(EmailBackend, 'send_messages', record)
+    call_command('send_outbox', once=True, stdout=None)
+
+    assert in_transaction == [False, False], (
+        'Проверьте, что письма отправляются без открытой транзакции '
+        'и блокировок пачки'
+    )
+    assert OutboxEmail.objects.filter(sent_at__isnull=False).count() == 2
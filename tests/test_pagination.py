@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews.models import Review, Title
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def title():
+    title = Title.objects.create(name='Произведение', year=2000)
+    authors = User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(13)
+    )
+    now = timezone.now()
+    # Отзывы парами с одинаковой датой: курсор должен различать их по id.
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5,
+               pub_date=now - timedelta(minutes=i // 2))
+        for i, author in enumerate(authors)
+    )
+    return title
+
+
+class TestKeysetPagination:
+
+    def test_following_cursor_links(self, title):
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        pages = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            pages.append([review['id'] for review in response.json()['results']])
+            url = response.json()['next']
+
+        expected = list(
+            title.reviews.order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        assert [len(page) for page in pages] == [5, 5, 3]
+        assert sum(pages, []) == expected, (
+            'Проверьте, что страницы по курсору идут без пропусков и повторов'
+        )
+
+    def test_invalid_cursor(self, title):
+        response = APIClient().get(
+            f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&cursor=xx'
+        )
+        assert response.status_code == 404
@@ -0,0 +1,124 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.slugs import SLUG_CACHES
+from reviews.models import Title
+from reviews.synthetic import generate_dataset
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+# Маршрут, адрес и верхняя граница числа запросов. Граница включает
+# выборку пользователя по токену и чтение версий кэша ответов и не должна
+# зависеть ни от размера страницы, ни от объёма данных.
+ROUTES = [
+    ('category-list', '/api/v1/categories/', 4),
+    ('category-list search', '/api/v1/categories/?search=1', 4),
+    ('genre-list', '/api/v1/genres/', 4),
+    ('title-list', '/api/v1/titles/', 5),
+    ('title-list filters', '/api/v1/titles/?genre=genre-1&year=2000', 6),
+    ('title-list category', '/api/v1/titles/?category=category-1', 6),
+    ('title-list search', '/api/v1/titles/?search=Произведение', 5),
+    ('title-detail', '/api/v1/titles/{title}/', 4),
+    ('reviews-list', '/api/v1/titles/{title}/reviews/', 4),
+    ('reviews-list cursor',
+     '/api/v1/titles/{title}/reviews/?pagination=cursor', 3),
+    ('reviews-detail', '/api/v1/titles/{title}/reviews/{review}/', 3),
+    ('comments-list', '/api/v1/titles/{title}/reviews/{review}/comments/', 4),
+    ('comments-detail',
+     '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/', 3),
+    ('user-list', '/api/v1/users/', 3),
+    ('user-detail', '/api/v1/users/user1/', 2),
+    ('user-me', '/api/v1/users/me/', 1),
+    ('metrics', '/api/v1/metrics/', 1),
+]
+
+
+@pytest.fixture(scope='module')
+def catalogue(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        generate_dataset(
+            titles=2000, users=300, reviews_per_title=5,
+            comments_per_review=3,
+        )
+        admin = User.objects.create(
+            username='admin', email='admin@yamdb.fake', role=User.ADMIN
+        )
+        title = Title.objects.order_by('id').first()
+        review = title.reviews.first()
+        ids = {
+            'title': title.id,
+            'review': review.id,
+            'comment': review.comments.first().id,
+        }
+    yield admin, ids
+    with django_db_blocker.unblock():
+        call_command('flush', interactive=False, verbosity=0)
+
+
+@pytest.fixture
+def admin_client(catalogue):
+    admin, _ = catalogue
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+def count_queries(client, url, assert_max_num_queries, limit):
+    # Кэш ответов скрыл бы запросы к базе. Справочники слагов, наоборот,
+    # загружаются раз на процесс, в счёт входит только чтение их версии.
+    cache.clear()
+    for slug_cache in SLUG_CACHES.values():
+        slug_cache.get_ids(())
+    with assert_max_num_queries(limit) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что {url} отвечает 200, получено {response.status_code}'
+    )
+    return len(queries)
+
+
+class TestQueryCounts:
+
+    @pytest.mark.parametrize('name, url, limit', ROUTES)
+    def test_route_queries_are_bounded(
+        self, name, url, limit, catalogue, admin_client, monkeypatch,
+        django_assert_max_num_queries,
+    ):
+        _, ids = catalogue
+        url = url.format(**ids)
+        counts = []
+        for page_size in (5, 50):
+            monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+            counts.append(count_queries(
+                admin_client, url, django_assert_max_num_queries, limit
+            ))
+        assert counts[0] == counts[1], (
+            f'Проверьте, что число запросов к {name} не зависит от размера '
+            f'страницы: {counts}'
+        )
+
+    def test_signup_and_token(self, catalogue,
+                              django_assert_max_num_queries):
+        client = APIClient()
+        # Две вставки: пользователь и письмо в outbox. Их транзакция внутри
+        # тестовой добавляет SAVEPOINT и RELEASE.
+        with django_assert_max_num_queries(4):
+            response = client.post('/api/v1/auth/signup/', data={
+                'username': 'newbie', 'email': 'newbie@yamdb.fake',
+            })
+        assert response.status_code == 200, response.content
+
+        code = User.objects.get(username='newbie').confirmation_code
+        # Чтение пользователя и условный UPDATE, сбрасывающий код.
+        with django_assert_max_num_queries(2):
+            response = client.post('/api/v1/auth/token/', data={
+                'username': 'newbie', 'confirmation_code': code,
+            })
+        assert response.status_code == 200, response.content
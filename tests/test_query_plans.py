@@ -0,0 +1,161 @@
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.filters import TitleFilter
+from api.pagination import PubDateKeysetPagination
+from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'postgresql',
+        reason='Планы запросов проверяются только на PostgreSQL',
+    ),
+]
+
+
+@pytest.fixture
+def dataset():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    authors = User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(20)
+    )
+    titles = Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=1900 + i, category=category)
+        for i in range(50)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title_id=title.id, genre_id=genre.id)
+        for title in titles
+    )
+    reviews = Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5,
+               pub_date=timezone.now())
+        for title in titles for author in authors
+    )
+    Comment.objects.bulk_create(
+        Comment(review=review, author=authors[0], text='Комментарий')
+        for review in reviews
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        # На маленьких таблицах планировщику выгоднее seq scan и сортировка,
+        # поэтому они запрещаются: проверяется, что индекс пригоден и для
+        # условия, и для порядка строк.
+        cursor.execute('SET enable_seqscan = off')
+        cursor.execute('SET enable_sort = off')
+    yield titles[0], reviews[0]
+    with connection.cursor() as cursor:
+        cursor.execute('RESET enable_seqscan')
+        cursor.execute('RESET enable_sort')
+
+
+def assert_uses_index(queryset, name, index_name):
+    plan = queryset.explain()
+    assert index_name in plan, (
+        f'Проверьте, что запрос «{name}» использует индекс '
+        f'{index_name}:\n{plan}'
+    )
+    assert 'Sort' not in plan, (
+        f'Проверьте, что запрос «{name}» не сортирует строки:\n{plan}'
+    )
+
+
+class TestQueryPlans:
+
+    def test_review_list(self, dataset):
+        title, _ = dataset
+        view = ReviewViewSet(kwargs={'title_id': title.id})
+        assert_uses_index(
+            view.get_queryset()[:5], 'reviews-list',
+            'review_title_pub_date_idx',
+        )
+
+    def test_review_keyset_page(self, dataset):
+        title, _ = dataset
+        view = ReviewViewSet(kwargs={'title_id': title.id})
+        queryset = view.get_queryset().order_by(
+            *PubDateKeysetPagination.ordering
+        )
+        assert_uses_index(
+            queryset[:6], 'reviews-list (cursor)', 'review_title_pub_id_idx'
+        )
+
+    def test_review_keyset_deep_page(self, dataset):
+        title, _ = dataset
+        view = ReviewViewSet(kwargs={'title_id': title.id})
+        paginator = PubDateKeysetPagination()
+        middle = view.get_queryset().order_by(*paginator.ordering)[10]
+        cursor = paginator.encode_cursor(middle.pub_date, middle.id)
+        request = Request(APIRequestFactory().get('/', {'cursor': cursor}))
+
+        queryset = paginator.get_page_queryset(view.get_queryset(), request)
+        plan = queryset[:6].explain()
+        assert_uses_index(
+            queryset[:6], 'reviews-list (cursor page)',
+            'review_title_pub_id_idx',
+        )
+        index_cond = next(
+            line for line in plan.splitlines() if 'Index Cond' in line
+        )
+        assert 'pub_date' in index_cond, (
+            'Проверьте, что курсор задаёт границу диапазона индекса, а не '
+            f'отбрасывает строки фильтром:\n{plan}'
+        )
+
+    def test_comment_list(self, dataset):
+        title, review = dataset
+        view = CommentViewSet(
+            kwargs={'title_id': title.id, 'review_id': review.id}
+        )
+        assert_uses_index(
+            view.get_queryset()[:5], 'comments-list',
+            'comment_review_pub_id_idx',
+        )
+
+    @pytest.mark.parametrize('params, index_name', [
+        ({'year': '1910'}, 'title_year_idx'),
+        ({'category': 'movie'}, 'Index'),
+        ({'genre': 'drama'}, 'Index'),
+    ])
+    def test_title_filters(self, dataset, params, index_name):
+        queryset = TitleFilter(params, queryset=TitleViewSet.queryset).qs
+        assert_uses_index(
+            queryset[:5], f'titles-list {params}', index_name
+        )
+
+    def test_title_search(self, dataset):
+        queryset = TitleFilter(
+            {'search': '42'}, queryset=TitleViewSet.queryset
+        ).qs
+        # Сортировка по релевантности нужна, но только по найденным строкам.
+        # Полный проход по B-tree индексу с фильтром на 50 строках дешевле
+        # GIN, поэтому он тоже запрещается.
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_sort = on')
+            cursor.execute('SET enable_indexscan = off')
+        plan = queryset[:5].explain()
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_indexscan')
+        assert 'title_search_vector_idx' in plan, (
+            f'Проверьте, что поиск использует title_search_vector_idx:\n{plan}'
+        )
+
+    @pytest.mark.parametrize('action, params, index_name', [
+        ('top', {}, 'title_top_idx'),
+        ('top', {'category': 'movie'}, 'title_category_top_idx'),
+        ('trending', {}, 'title_trending_idx'),
+    ])
+    def test_title_rankings(self, dataset, action, params, index_name):
+        view = TitleViewSet(action=action)
+        queryset = TitleFilter(params, queryset=view.get_queryset()).qs
+        assert_uses_index(
+            queryset[:5], f'titles-{action} {params}', index_name
+        )
@@ -0,0 +1,184 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def authors():
+    return User.objects.bulk_create(
+        User(username=f'author{index}', email=f'author{index}@yamdb.fake')
+        for index in range(6)
+    )
+
+
+def review(title, author, score, days_ago=0):
+    item = Review.objects.create(
+        title=title, author=author, text='Отзыв', score=score
+    )
+    if days_ago:
+        # pub_date заполняется при создании, поэтому дата сдвигается
+        # отдельно, а рейтинги пересчитываются заново.
+        Review.objects.filter(pk=item.pk).update(
+            pub_date=timezone.now() - timedelta(days=days_ago)
+        )
+        Title.objects.filter(pk=title.pk).recalculate_ratings()
+    return item
+
+
+def names(url):
+    cache.clear()
+    response = APIClient().get(url)
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+class TestRankings:
+
+    def test_weighted_rating(self, settings, authors):
+        settings.RATING_PRIOR_MEAN = 5
+        settings.RATING_PRIOR_WEIGHT = 2
+        title = Title.objects.create(name='Произведение', year=2000)
+        review(title, authors[0], 10)
+        review(title, authors[1], 8)
+
+        title.refresh_from_db()
+        assert title.weighted_rating == pytest.approx((18 + 2 * 5) / 4)
+
+    def test_incremental_matches_recalculation(self, authors):
+        title = Title.objects.create(name='Произведение', year=2000)
+        reviews = [
+            review(title, author, score)
+            for author, score in zip(authors, (3, 9, 7, 10))
+        ]
+        reviews[1].delete()
+        title.refresh_from_db()
+        incremental = (title.weighted_rating, title.trending_score)
+
+        Title.objects.recalculate_ratings()
+        title.refresh_from_db()
+        assert (title.weighted_rating, title.trending_score) == (
+            pytest.approx(incremental[0]), pytest.approx(incremental[1])
+        )
+
+    def test_last_review_removed(self, authors):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review(title, authors[0], 5).delete()
+
+        title.refresh_from_db()
+        assert title.weighted_rating is None
+        assert title.trending_score is None
+
+    def test_top(self, settings, authors):
+        settings.RATING_PRIOR_MEAN = 5
+        settings.RATING_PRIOR_WEIGHT = 3
+        # Одна десятка весит меньше, чем много девяток.
+        single = Title.objects.create(name='Одна оценка', year=2000)
+        review(single, authors[0], 10)
+        popular = Title.objects.create(name='Много оценок', year=2000)
+        for author in authors:
+            review(popular, author, 9)
+        Title.objects.create(name='Без отзывов', year=2000)
+
+        assert names('/api/v1/titles/top/') == ['Много оценок', 'Одна оценка']
+
+        settings.RANKING_MIN_REVIEWS = 2
+        assert names('/api/v1/titles/top/') == ['Много оценок']
+
+    def test_top_by_genre_and_category(self, authors):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        titles = [
+            Title.objects.create(
+                name=f'Произведение {index}', year=2000, category=category
+            )
+            for index in range(3)
+        ]
+        titles[0].genre.set([genre])
+        titles[2].genre.set([genre])
+        for title, score in zip(titles, (4, 8, 6)):
+            review(title, authors[0], score)
+
+        assert names('/api/v1/titles/top/?category=movie') == [
+            'Произведение 1', 'Произведение 2', 'Произведение 0'
+        ]
+        assert names('/api/v1/titles/top/?genre=drama') == [
+            'Произведение 2', 'Произведение 0'
+        ]
+
+    @pytest.mark.parametrize('fast', [True, False])
+    @pytest.mark.parametrize('action, key', [
+        ('top', 'weighted_rating'), ('trending', 'trending_score'),
+    ])
+    def test_rankings_page_by_key(self, settings, authors, fast, action,
+                                  key):
+        settings.FAST_SERIALIZERS = fast
+        titles = Title.objects.bulk_create(
+            Title(name=f'Произведение {index}', year=2000)
+            for index in range(13)
+        )
+        # Оценки парами: курсор должен различать равные ключи по id.
+        for index, title in enumerate(titles[:-1]):
+            review(title, authors[0], 10 - index // 2)
+        cache.clear()
+        client = APIClient()
+        url = f'/api/v1/titles/{action}/'
+        pages = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = client.get(url)
+                assert response.status_code == 200
+                pages.append(
+                    [title['id'] for title in response.json()['results']]
+                )
+                url = response.json()['next']
+
+        expected = list(
+            Title.objects.exclude(**{key: None})
+            .order_by(f'-{key}', 'id')
+            .values_list('id', flat=True)
+        )
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert sum(pages, []) == expected, (
+            'Проверьте, что страницы выдачи идут без пропусков и повторов'
+        )
+        assert not any(
+            'COUNT(' in query['sql'] for query in queries.captured_queries
+        ), 'Проверьте, что выдача не считает общее количество'
+
+    def test_rankings_invalid_cursor(self):
+        client = APIClient()
+        for cursor in ('xx', 'bmFufDE='):
+            response = client.get(f'/api/v1/titles/top/?cursor={cursor}')
+            assert response.status_code == 404, cursor
+
+    def test_trending(self, authors):
+        old = Title.objects.create(name='Старое', year=2000)
+        for author in authors[:4]:
+            review(old, author, 10, days_ago=60)
+        fresh = Title.objects.create(name='Свежее', year=2000)
+        for author in authors[:2]:
+            review(fresh, author, 5)
+        Title.objects.create(name='Без отзывов', year=2000)
+
+        assert names('/api/v1/titles/trending/') == ['Свежее', 'Старое'], (
+            'Проверьте, что недавние отзывы весят больше старых'
+        )
+
+    def test_rebuild_after_settings_change(self, settings, authors):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review(title, authors[0], 10)
+        settings.RATING_PRIOR_WEIGHT = 0
+
+        Title.objects.recalculate_ratings()
+        title.refresh_from_db()
+        assert title.weighted_rating == 10
@@ -0,0 +1,140 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import get_auth_state
+from api.db import replica_reads, reset_replicas
+from api.metrics import registry
+from api.slugs import genre_slugs
+from reviews.models import Genre, Title
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def replica(settings):
+    # Вторая база — отдельное соединение с той же тестовой базой, поэтому
+    # тестам нужен transaction=True: реплика видит только закоммиченное.
+    connections.databases['replica'] = dict(connections['default'].settings_dict)
+    settings.REPLICA_DATABASES = ['replica']
+    reset_replicas()
+    cache.clear()
+    yield connections['replica']
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+    reset_replicas()
+
+
+@pytest.fixture
+def title():
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+def reads_replica(client, url):
+    with CaptureQueriesContext(connections['replica']) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries) > 0
+
+
+class TestReplicaRouting:
+
+    def test_safe_requests_read_replica(self, replica, title):
+        assert reads_replica(APIClient(), f'/api/v1/titles/{title.id}/reviews/'), (
+            'Проверьте, что GET-запросы читают с реплики'
+        )
+
+    def test_writes_go_to_primary(self, replica, title, user_client):
+        with CaptureQueriesContext(replica) as queries:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Отзыв', 'score': 5},
+            )
+        assert response.status_code == 201
+        assert len(queries) == 0
+
+    def test_reads_stick_to_primary_after_write(self, replica, title,
+                                                user_client):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert 'primary_until' in response.cookies
+
+        assert not reads_replica(user_client, url), (
+            'Проверьте, что после записи клиент читает с основной базы'
+        )
+
+    def test_only_writer_sticks(self, replica, title, user_client):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, {'text': 'Отзыв', 'score': 5})
+
+        assert reads_replica(APIClient(), url), (
+            'Проверьте, что закрепление касается только писавшего клиента'
+        )
+
+    def test_forged_sticky_cookie_is_ignored(self, replica, title):
+        client = APIClient()
+        client.cookies['primary_until'] = '9999999999'
+        assert reads_replica(client, f'/api/v1/titles/{title.id}/reviews/')
+
+    def test_response_cache_is_filled_from_primary(self, replica, title):
+        assert not reads_replica(APIClient(), '/api/v1/titles/'), (
+            'Проверьте, что кэш ответов не заполняется с реплики'
+        )
+
+    def test_replica_body_has_no_validators(self, replica, title,
+                                            user_client):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = APIClient().get(url)
+        assert 'ETag' not in response, (
+            'Проверьте, что тело с реплики не получает ETag новой версии'
+        )
+
+        user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert 'ETag' in user_client.get(url)
+
+    def test_failed_write_does_not_stick(self, replica, title, user_client):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 50})
+        assert response.status_code == 400
+        assert 'primary_until' not in response.cookies
+
+    def test_long_lived_copies_read_primary(self, replica, user):
+        Genre.objects.create(name='Драма', slug='drama')
+        genre_slugs.reset()
+        with CaptureQueriesContext(replica) as queries, replica_reads():
+            state = get_auth_state(user.id)
+            ids = genre_slugs.get_ids(['drama', 'comedy'])
+        assert state['username'] == user.username
+        assert list(ids) == ['drama']
+        assert len(queries) == 0, (
+            'Проверьте, что статус пользователя и справочник слагов '
+            'не читаются с реплики'
+        )
+
+    def test_broken_replica_falls_back_to_primary(self, replica, title):
+        replica.settings_dict['PORT'] = '1'
+        before = registry.snapshot()['counters'].get(
+            'db_replica_failures:replica', 0
+        )
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+
+        assert client.get(url).status_code == 200
+        assert client.get(url).status_code == 200
+        failures = registry.snapshot()['counters'][
+            'db_replica_failures:replica'
+        ]
+        assert failures == before + 1, (
+            'Проверьте, что недоступная реплика пропускается до повтора'
+        )
+
+    def test_no_replicas_no_sticky_cookie(self, title, user_client):
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Отзыв', 'score': 5},
+        )
+        assert response.status_code == 201
+        assert 'primary_until' not in response.cookies
@@ -0,0 +1,96 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Genre, Title
+from users.models import User
+
+# Версии каталога сдвигаются после коммита.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+def assert_miss_then_hit(url):
+    client = APIClient()
+    assert client.get(url)['X-Cache'] == 'MISS'
+    assert client.get(url)['X-Cache'] == 'HIT'
+
+
+class TestResponseCache:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/', '/api/v1/genres/', '/api/v1/categories/'
+    ])
+    def test_second_get_is_hit(self, title, url):
+        assert_miss_then_hit(url)
+
+    def test_metrics_count_hits_and_misses(self, title, admin_client):
+        assert_miss_then_hit('/api/v1/titles/')
+        APIClient().get('/api/v1/titles/')
+
+        stats = admin_client.get('/api/v1/metrics/').json()['cache']
+        assert stats == {'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3}
+
+    def test_dummy_cache_disables_caching(self, title, settings):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }}
+        client = APIClient()
+        for _ in range(2):
+            response = client.get('/api/v1/titles/')
+            assert response.status_code == 200
+            assert response['X-Cache'] == 'MISS'
+        assert 'ETag' in response
+
+    @pytest.mark.parametrize('method, url, data, status', [
+        ('post', '/api/v1/titles/',
+         {'name': 'Новый', 'year': 2001, 'category': 'movie',
+          'genre': ['drama']}, 201),
+        ('patch', '/api/v1/titles/{title.id}/', {'name': 'Другой'}, 200),
+        ('delete', '/api/v1/titles/{title.id}/', None, 204),
+        ('post', '/api/v1/genres/', {'name': 'Комедия', 'slug': 'comedy'},
+         201),
+        ('delete', '/api/v1/genres/drama/', None, 204),
+        ('post', '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'},
+         201),
+        ('delete', '/api/v1/categories/movie/', None, 204),
+    ])
+    def test_catalogue_write_makes_next_get_miss(
+        self, title, admin_client, method, url, data, status
+    ):
+        list_url = '/api/v1/titles/'
+        assert_miss_then_hit(list_url)
+
+        response = getattr(admin_client, method)(
+            url.format(title=title), data, format='json'
+        )
+        assert response.status_code == status
+
+        response = APIClient().get(list_url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что запись в каталог сбрасывает кэш ответов'
+        )
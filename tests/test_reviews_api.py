@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from django.db import IntegrityError, connection
+
+from api.serializers import ReviewSerializer
+from reviews.models import Category, Review, Title
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    empty = Title.objects.create(name='Без отзывов', year=2000,
+                                 category=category)
+    popular = Title.objects.create(name='Популярное', year=2000,
+                                   category=category)
+    authors = User.objects.bulk_create(
+        User(username=f'author{i}', email=f'author{i}@yamdb.fake')
+        for i in range(2000)
+    )
+    Review.objects.bulk_create(
+        Review(title=popular, author=author, text='Отзыв', score=7)
+        for author in authors
+    )
+    Title.objects.recalculate_ratings()
+    return empty, popular
+
+
+def post_review(client, title):
+    return client.post(
+        f'/api/v1/titles/{title.id}/reviews/',
+        data={'text': 'Новый отзыв', 'score': 10},
+    )
+
+
+class TestReviewCreate:
+
+    def test_duplicate_review(self, user_client, titles):
+        title, _ = titles
+        response = post_review(user_client, title)
+        assert response.status_code == 201, (
+            'Проверьте, что первый отзыв на произведение создаётся'
+        )
+        response = post_review(user_client, title)
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв того же автора возвращает 400'
+        )
+        assert 'non_field_errors' in response.json()
+        assert Review.objects.filter(title=title).count() == 1
+
+    def test_create_cost_does_not_depend_on_review_count(
+        self, user_client, titles, django_assert_max_num_queries
+    ):
+        costs = {}
+        for title in titles:
+            with django_assert_max_num_queries(6) as queries:
+                started = time.perf_counter()
+                response = post_review(user_client, title)
+                elapsed = time.perf_counter() - started
+            assert response.status_code == 201
+            costs[title.name] = (len(queries), f'{elapsed * 1000:.1f} мс')
+
+        empty, popular = titles
+        assert costs[empty.name][0] == costs[popular.name][0], (
+            'Проверьте, что создание отзыва не выбирает отзывы произведения: '
+            f'{costs}'
+        )
+        popular.refresh_from_db()
+        assert popular.rating_count == 2001
+
+    def test_other_integrity_errors_are_not_duplicates(
+        self, user_client, titles, monkeypatch
+    ):
+        def save(serializer, **kwargs):
+            # Нарушение другого ограничения, не "unique review".
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'INSERT INTO reviews_category (name, slug) '
+                    "VALUES ('Фильм', 'movie')"
+                )
+
+        monkeypatch.setattr(ReviewSerializer, 'save', save)
+        title, _ = titles
+        with pytest.raises(IntegrityError):
+            post_review(user_client, title)
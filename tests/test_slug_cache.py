@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import Category, Genre, Title
+from users.models import User
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@yamdb.fake', role=User.ADMIN
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def catalogue():
+    Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+
+
+def slug_lookups(client, method, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data, format='json')
+    lookups = [
+        query['sql'] for query in context.captured_queries
+        if '."slug" = ' in query['sql'] or '."slug" IN ' in query['sql']
+    ]
+    return response, lookups
+
+
+def create_title(client, **data):
+    return slug_lookups(client, 'post', '/api/v1/titles/', {
+        'name': 'Фильм', 'year': 2000, 'category': 'movie',
+        'genre': ['drama'], **data,
+    })
+
+
+class TestSlugCache:
+
+    @pytest.mark.django_db
+    def test_title_create_resolves_slugs_from_cache(self, admin_client,
+                                                    catalogue):
+        create_title(admin_client)
+
+        response, lookups = create_title(admin_client)
+
+        assert response.status_code == 201, response.content
+        assert response.data['category'] == 'movie'
+        assert response.data['genre'] == ['drama']
+        assert lookups == [], (
+            'Проверьте, что слаги жанров и категорий не ищутся в базе '
+            'на каждый запрос'
+        )
+
+    @pytest.mark.django_db
+    def test_unknown_slug_is_rejected(self, admin_client, catalogue):
+        response, _ = create_title(admin_client, genre=['unknown'])
+
+        assert response.status_code == 400
+        assert 'genre' in response.data
+
+    @pytest.mark.django_db
+    def test_filters_use_foreign_keys(self, admin_client, catalogue):
+        create_title(admin_client)
+        slug_lookups(admin_client, 'get', '/api/v1/titles/?genre=drama')
+
+        for query in ('genre=drama', 'category=movie'):
+            response, lookups = slug_lookups(
+                admin_client, 'get', f'/api/v1/titles/?{query}'
+            )
+            assert response.data['count'] == 1
+            assert lookups == []
+
+        response = admin_client.get('/api/v1/titles/?genre=unknown')
+        assert response.data['count'] == 0
+
+    @pytest.mark.django_db
+    def test_slug_created_without_signals_is_found(self, admin_client,
+                                                   catalogue):
+        create_title(admin_client)
+        Genre.objects.bulk_create([Genre(name='Комедия', slug='comedy')])
+
+        response, _ = create_title(admin_client, genre=['comedy'])
+
+        assert response.status_code == 201, response.content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_slug_change_invalidates_cache(self, admin_client, catalogue):
+        create_title(admin_client)
+        genre = Genre.objects.get(slug='drama')
+        genre.slug = 'tragedy'
+        genre.save()
+
+        response, _ = create_title(admin_client)
+        assert response.status_code == 400, (
+            'Проверьте, что изменение слага сбрасывает кэш справочника'
+        )
+        response, _ = create_title(admin_client, genre=['tragedy'])
+        assert response.status_code == 201
+        assert Title.objects.filter(genre=genre).count() == 2
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.metrics import registry
+from api.throttling import CacheBucketStore, MemoryBucketStore
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates,
+        }
+    return set_rates
+
+
+def rejected(scope):
+    return registry.snapshot()['counters'].get(f'throttle_rejected:{scope}', 0)
+
+
+class TestThrottling:
+
+    def test_read_limit(self, rates):
+        rates(read='3/min')
+        client = APIClient()
+        before = rejected('read')
+        statuses = [
+            client.get('/api/v1/categories/').status_code for _ in range(4)
+        ]
+
+        assert statuses == [200, 200, 200, 429], (
+            'Проверьте, что чтение ограничено областью read'
+        )
+        response = client.get('/api/v1/categories/')
+        assert int(response['Retry-After']) > 0
+        assert rejected('read') == before + 2
+
+    def test_users_have_own_buckets(self, rates, user_client):
+        rates(read='1/min')
+        anonymous = APIClient()
+        assert anonymous.get('/api/v1/categories/').status_code == 200
+        assert anonymous.get('/api/v1/categories/').status_code == 429
+        assert user_client.get('/api/v1/categories/').status_code == 200, (
+            'Проверьте, что пользователь не делит лимит с IP-адресом'
+        )
+
+    def test_forwarded_clients_have_own_buckets(self, rates):
+        rates(signup='1/min')
+        client = APIClient()
+
+        def signup(ip, username):
+            # nginx дописывает адрес клиента в конец X-Forwarded-For.
+            return client.post(
+                '/api/v1/auth/signup/',
+                {'username': username, 'email': f'{username}@yamdb.fake'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.1, {ip}',
+            ).status_code
+
+        assert signup('203.0.113.1', 'first') == 200
+        assert signup('203.0.113.1', 'second') == 429
+        assert signup('203.0.113.2', 'third') == 200, (
+            'Проверьте, что клиенты за nginx не делят одно ведро'
+        )
+
+    def test_scopes_are_separate(self, rates, user_client):
+        rates(read='1/min', write='1/min', signup='1/min')
+        client = APIClient()
+        assert client.get('/api/v1/categories/').status_code == 200
+        assert client.get('/api/v1/categories/').status_code == 429
+
+        signup = {'username': 'new', 'email': 'new@yamdb.fake'}
+        assert client.post('/api/v1/auth/signup/', signup).status_code == 200
+        assert client.post('/api/v1/auth/signup/', signup).status_code == 429
+
+        assert user_client.post('/api/v1/categories/', {}).status_code == 403
+        assert user_client.get('/api/v1/categories/').status_code == 200
+
+    def test_no_rate_no_limit(self, rates):
+        rates()
+        client = APIClient()
+        for _ in range(5):
+            assert client.get('/api/v1/categories/').status_code == 200
+
+
+class TestBucketStores:
+
+    @pytest.mark.parametrize('store_class', [MemoryBucketStore,
+                                             CacheBucketStore])
+    def test_bucket_refills(self, monkeypatch, store_class):
+        cache.clear()
+        now = [1000.0]
+        monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        store = store_class()
+
+        assert [store.consume('key', 1, 2) for _ in range(3)] == [0, 0, 1]
+        now[0] += 0.5
+        assert store.consume('key', 1, 2) == 0.5
+        now[0] += 0.5
+        assert store.consume('key', 1, 2) == 0, (
+            'Проверьте, что ведро наполняется со временем'
+        )
+
+    def test_check_is_cheap(self):
+        store = MemoryBucketStore()
+        checks = 10000
+        started = time.perf_counter()
+        for index in range(checks):
+            store.consume(f'key{index % 100}', 0.001, 1000)
+        per_check = (time.perf_counter() - started) / checks
+        assert per_check < 0.0001, (
+            'Проверьте, что проверка лимита занимает меньше 0,1 мс'
+        )
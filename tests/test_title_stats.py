@@ -0,0 +1,246 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import SCORES, Review, Title
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def title():
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+@pytest.fixture
+def authors():
+    return User.objects.bulk_create(
+        User(username=f'author{index}', email=f'author{index}@yamdb.fake')
+        for index in range(4)
+    )
+
+
+def stats_of(title):
+    title.refresh_from_db()
+    return (
+        title.rating_sum,
+        title.rating_count,
+        title.rating,
+        title.last_review_date,
+        [getattr(title, f'score_{score}') for score in SCORES],
+    )
+
+
+def assert_consistent(title):
+    incremental = stats_of(title)
+    Title.objects.filter(pk=title.pk).recalculate_ratings()
+    assert stats_of(title) == incremental, (
+        'Проверьте, что инкрементальная статистика совпадает с пересчётом'
+    )
+
+
+class TestTitleStats:
+
+    def test_create_review(self, title, authors):
+        for author, score in zip(authors, (3, 7, 7)):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+
+        _, count, rating, last, scores = stats_of(title)
+        assert count == 3
+        assert rating == pytest.approx(17 / 3)
+        assert scores[7 - 1] == 2 and scores[3 - 1] == 1 and sum(scores) == 3
+        assert last == title.reviews.latest('pub_date').pub_date
+        assert_consistent(title)
+
+    def test_delete_latest_review(self, title, authors):
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+            for author, score in zip(authors, (4, 9))
+        ]
+        reviews[1].delete()
+
+        _, count, rating, last, scores = stats_of(title)
+        assert (count, rating, last) == (1, 4, reviews[0].pub_date)
+        assert scores[9 - 1] == 0
+        assert_consistent(title)
+
+        reviews[0].delete()
+        assert stats_of(title) == (0, 0, None, None, [0] * len(SCORES))
+
+    def test_update_score(self, title, authors):
+        review = Review.objects.create(
+            title=title, author=authors[0], text='Отзыв', score=2
+        )
+        review.score = 10
+        review.save()
+
+        assert stats_of(title)[4][10 - 1] == 1
+        assert stats_of(title)[4][2 - 1] == 0
+        assert_consistent(title)
+
+    def test_text_edit_skips_rating_update(self, title, authors):
+        Review.objects.create(
+            title=title, author=authors[0], text='Отзыв', score=2
+        )
+        review = Review.objects.get(title=title)
+        review.text = 'Новый текст'
+        with CaptureQueriesContext(connection) as queries:
+            review.save()
+
+        assert not any(
+            query['sql'].startswith('UPDATE "reviews_title"')
+            for query in queries.captured_queries
+        ), 'Проверьте, что правка текста не пересчитывает рейтинг'
+
+    def test_loaded_review_moves_score(self, title, authors):
+        other = Title.objects.create(name='Другое', year=2000)
+        for author, score in zip(authors, (2, 6)):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+        review = Review.objects.get(title=title, author=authors[0])
+        review.score = 9
+        review.save()
+        review.title = other
+        review.save()
+
+        assert stats_of(title)[1:3] == (1, 6)
+        assert stats_of(other)[1:3] == (1, 9)
+        assert_consistent(title)
+        assert_consistent(other)
+
+    def test_delete_updates_trending_score(self, title, authors):
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            for author in authors
+        ]
+        for days, review in enumerate(reviews):
+            Review.objects.filter(pk=review.pk).update(
+                pub_date=review.pub_date - timedelta(days=10 * days)
+            )
+        Title.objects.filter(pk=title.pk).recalculate_ratings()
+
+        for review in Review.objects.order_by('pub_date')[:3]:
+            review.delete()
+            title.refresh_from_db()
+            incremental = title.trending_score
+            Title.objects.filter(pk=title.pk).recalculate_ratings()
+            title.refresh_from_db()
+            assert incremental == pytest.approx(title.trending_score), (
+                'Проверьте, что удаление отзыва пересчитывает '
+                'trending_score без полного пересчёта'
+            )
+
+    def test_title_delete_skips_rating_updates(self):
+        authors = User.objects.bulk_create(
+            User(username=f'author{index}', email=f'author{index}@yamdb.fake')
+            for index in range(50)
+        )
+        costs = []
+        for reviews in (1, 50):
+            title = Title.objects.create(name='Произведение', year=2000)
+            for author in authors[:reviews]:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=5
+                )
+            with CaptureQueriesContext(connection) as queries:
+                title.delete()
+            costs.append(len(queries))
+            assert not any(
+                query['sql'].startswith('UPDATE')
+                for query in queries.captured_queries
+            ), 'Проверьте, что рейтинг удаляемого произведения не обновляется'
+
+        assert costs[0] == costs[1], costs
+
+    def test_author_delete_updates_titles_in_batch(self, authors):
+        titles = Title.objects.bulk_create(
+            Title(name=f'Произведение {index}', year=2000)
+            for index in range(5)
+        )
+        for title, score in zip(titles, (3, 3, 7, 7, 7)):
+            for author in authors[:2]:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=score
+                )
+
+        with CaptureQueriesContext(connection) as queries:
+            authors[0].delete()
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(updates) == 2, (
+            'Проверьте, что произведения обновляются одним запросом на '
+            'каждую убранную оценку'
+        )
+        for title, score in zip(titles, (3, 3, 7, 7, 7)):
+            _, count, rating, _, _ = stats_of(title)
+            assert (count, rating) == (1, score)
+            assert_consistent(title)
+
+
+class TestTitleStatsApi:
+
+    @pytest.fixture
+    def reviewed(self, title, authors):
+        for author, score in zip(authors, (1, 10, 10)):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+        cache.clear()
+        return title
+
+    def test_stats_route(self, reviewed, django_assert_num_queries):
+        client = APIClient()
+        with django_assert_num_queries(1):
+            response = client.get(f'/api/v1/titles/{reviewed.id}/stats/')
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['id'] == reviewed.id
+        assert data['rating'] == 7
+        assert data['review_count'] == 3
+        assert data['scores'] == {
+            str(score): {1: 1, 10: 2}.get(score, 0) for score in SCORES
+        }
+        assert data['last_review_date'] is not None
+
+    def test_stats_route_not_found(self):
+        client = APIClient()
+        for pk in ('0', 'abc'):
+            response = client.get(f'/api/v1/titles/{pk}/stats/')
+            assert response.status_code == 404, pk
+
+    def test_stats_embedded_on_request(self, reviewed):
+        client = APIClient()
+        plain = client.get(f'/api/v1/titles/{reviewed.id}/').json()
+        assert 'stats' not in plain, (
+            'Проверьте, что статистика не выводится без ?expand=stats'
+        )
+
+        listed = client.get('/api/v1/titles/?expand=stats').json()
+        stats = listed['results'][0]['stats']
+        assert stats['review_count'] == 3
+        assert stats['scores']['10'] == 2
+
+    def test_stats_is_read_only(self, reviewed):
+        user = User.objects.create(username='user', email='user@yamdb.fake')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        response = client.post(f'/api/v1/titles/{reviewed.id}/stats/')
+        assert response.status_code == 403